@@ -0,0 +1,49 @@
+"""Tests for the in-process LRU cache."""
+
+from tirastore._cache import LRUCache
+
+
+def test_get_put():
+    cache = LRUCache(4)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("b", 0) == 0
+    assert "a" in cache
+    assert "b" not in cache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # "b" is now the oldest
+    cache.put("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert len(cache) == 2
+
+
+def test_pop_and_clear():
+    cache = LRUCache(4)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.pop("a")
+    cache.pop("missing")  # Should not raise
+    assert "a" not in cache
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_none_values_are_cached():
+    cache = LRUCache(4)
+    cache.put("a", None)
+    assert "a" in cache
+
+
+def test_zero_size_disables():
+    cache = LRUCache(0)
+    cache.put("a", 1)
+    assert "a" not in cache
+    assert len(cache) == 0
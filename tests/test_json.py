@@ -0,0 +1,45 @@
+"""Tests for the JSON encoding shim."""
+
+import json
+import math
+
+import pytest
+
+from tirastore import _json
+
+_RESULT = {"is_legal": True, "execution_times": [0.042, 1e-05, 3.0]}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_compact_round_trip(monkeypatch, use_orjson):
+    if use_orjson and _json.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(_json, "orjson", None)
+
+    text = _json.dumps(_RESULT)
+    assert isinstance(text, str)
+    assert " " not in text
+    assert json.loads(text) == _RESULT
+    assert _json.loads(text) == _RESULT
+
+
+def test_dumps_falls_back_for_unsupported_types():
+    class Seconds(float):
+        pass
+
+    text = _json.dumps({"execution_times": [Seconds(0.5)]})
+    assert json.loads(text) == {"execution_times": [0.5]}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_non_finite_floats_round_trip(monkeypatch, use_orjson):
+    if use_orjson and _json.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(_json, "orjson", None)
+
+    text = _json.dumps({"execution_times": [float("inf"), 0.5], "x": None})
+    assert text == '{"execution_times":[Infinity,0.5],"x":null}'
+    times = _json.loads('{"execution_times":[NaN,1.0]}')["execution_times"]
+    assert math.isnan(times[0]) and times[1] == 1.0
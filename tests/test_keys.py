@@ -1,6 +1,9 @@
 """Tests for deterministic key and hash generation."""
 
+import hashlib
+
 from tirastore._keys import canonical_json, make_key, make_program_hash
+from tirastore._schedule import normalize_schedule
 
 _SCHED = "R(L0,comps=['c1'])"
 
@@ -23,6 +26,16 @@ def test_make_program_hash_deterministic():
     assert len(h1) == 64  # SHA-256 hex
 
 
+def test_make_program_hash_memoized():
+    src = "void memo() { int x = 1; }"
+    expected = make_program_hash.__wrapped__(src)
+    make_program_hash.cache_clear()
+    assert make_program_hash(src) == expected
+    assert make_program_hash(src) == expected
+    info = make_program_hash.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
 def test_make_program_hash_normalizes():
     """Same code with different comments/whitespace produces the same hash."""
     src_a = "void foo() { int x = 1; }"
@@ -69,3 +82,13 @@ def test_make_key_normalizes_schedule():
     k1 = make_key(h, "R(L0,comps=['comp1'])")
     k2 = make_key(h, ' R( L0 , comps=["comp1"] ) ')
     assert k1 == k2
+
+
+def test_make_key_matches_canonical_json_digest():
+    h = make_program_hash("src")
+    for sched in (_SCHED, "S(L0,L1,4,8,comps=['c1','c2'])", "R(L0,comps=['é\\\"'])", ""):
+        blob = canonical_json({
+            "program_hash": h,
+            "tiralib_schedule_string": normalize_schedule(sched),
+        })
+        assert make_key(h, sched) == hashlib.sha256(blob.encode("utf-8")).hexdigest()
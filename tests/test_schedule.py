@@ -185,6 +185,10 @@ class TestNormalizeProgram:
         assert "include" not in result
         assert "voidbar();" == result
 
+    def test_strips_unicode_whitespace(self):
+        src = "int\u00a0x;\u2003\x0b\x1cint\u3000y;"
+        assert normalize_program(src) == "intx;inty;"
+
     def test_same_code_different_formatting(self):
         a = "void foo() { int x = 1; }"
         b = "void  foo()  {\n  int  x  =  1;\n}"
@@ -202,3 +206,14 @@ class TestNormalizeProgram:
 
     def test_different_code_differs(self):
         assert normalize_program("void foo() {}") != normalize_program("void bar() {}")
+
+
+def test_schedule_helpers_memoized():
+    sched = "R( L0 , comps=[\"memo\"] )"
+    normalize_schedule.cache_clear()
+    validate_schedule.cache_clear()
+    for _ in range(3):
+        assert normalize_schedule(sched) == "R(L0,comps=['memo'])"
+        assert validate_schedule(sched) == (True, "")
+    assert normalize_schedule.cache_info().hits == 2
+    assert validate_schedule.cache_info().hits == 2
@@ -1,8 +1,13 @@
 """Tests for the low-level SQLite storage layer."""
 
 import json
+import sqlite3
+import threading
+from unittest import mock
 
-from tirastore._store import Store
+import pytest
+
+from tirastore._store import Store, _detect_fstype
 
 
 def _init_store(tmp_path):
@@ -19,7 +24,249 @@ def test_init_and_meta(tmp_path):
 
     assert store.get_cpu_model() == "Intel Xeon E5-2680"
     assert store.get_slurm_cpus() == "4"
-    assert store.get_meta("schema_version") == "2"
+    assert store.get_meta("schema_version") == "3"
+
+
+def test_ensure_tables_adds_missing_view(tmp_path):
+    """Databases created before the records_full view existed get it on open."""
+    store = _init_store(tmp_path)
+    store.put_program("ph", "blur", "void blur() {}")
+    store.put("k1", "ph", "", "{}", "n", "u", "p")
+
+    conn = sqlite3.connect(str(store.db_path))
+    conn.execute("DROP VIEW records_full")
+    conn.close()
+
+    store.ensure_tables()
+    assert store.get("k1")["program_name"] == "blur"
+
+
+def test_ensure_tables_migrates_v2_dates(tmp_path):
+    """v2 databases stored ISO text dates; they are rebuilt as unix millis."""
+    db = tmp_path / "old.db"
+    conn = sqlite3.connect(str(db))
+    conn.executescript(
+        """
+        CREATE TABLE db_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE programs (program_hash TEXT PRIMARY KEY,
+                               program_name TEXT NOT NULL,
+                               source_code TEXT NOT NULL);
+        CREATE TABLE records (key TEXT PRIMARY KEY,
+                              program_hash TEXT NOT NULL REFERENCES programs(program_hash),
+                              schedule TEXT NOT NULL, result_json TEXT NOT NULL,
+                              hostname TEXT NOT NULL, username TEXT NOT NULL,
+                              creation_date TEXT NOT NULL, update_date TEXT NOT NULL,
+                              source_project TEXT NOT NULL DEFAULT '');
+        INSERT INTO db_meta VALUES ('schema_version', '2');
+        INSERT INTO programs VALUES ('ph', 'blur', 'void blur() {}');
+        INSERT INTO records VALUES ('k1', 'ph', '', '{}', 'n', 'u',
+                                    '2026-02-21T15:30:12.123456+00:00',
+                                    '2026-02-22T00:00:00+00:00', 'p');
+        """
+    )
+    conn.close()
+
+    store = Store(db)
+    store.ensure_tables()
+    assert store.get_meta("schema_version") == "3"
+
+    row = store.get("k1")
+    assert row["creation_date"] == 1771687812123
+    assert row["update_date"] == 1771718400000
+    assert row["program_name"] == "blur"
+
+    conn = sqlite3.connect(str(db))
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    assert {"idx_records_project", "idx_records_user", "idx_records_program"} <= indexes
+
+
+# ------------------------------------------------------------------
+# Journal mode selection
+# ------------------------------------------------------------------
+
+
+def test_detect_fstype_longest_mount(tmp_path):
+    mounts = tmp_path / "mounts"
+    mounts.write_text(
+        "/dev/sda1 / ext4 rw 0 0\n"
+        "10.0.0.1@o2ib:/scratch /lustre lustre rw 0 0\n"
+        "/dev/sdb1 /lustre/local\\040disk xfs rw 0 0\n"
+    )
+    assert _detect_fstype("/home/alice/db", str(mounts)) == "ext4"
+    assert _detect_fstype("/lustre/alice/db", str(mounts)) == "lustre"
+    assert _detect_fstype("/lustre/local disk/db", str(mounts)) == "xfs"
+    assert _detect_fstype("/lustrefs/db", str(mounts)) == "ext4"
+
+
+def test_detect_fstype_unreadable(tmp_path):
+    assert _detect_fstype("/", str(tmp_path / "missing")) is None
+
+
+@pytest.mark.parametrize("fstype, mode", [
+    ("ext4", "WAL"), ("lustre", "DELETE"), ("fuse.sshfs", "DELETE"),
+    ("wekafs", "DELETE"), (None, "DELETE"),
+])
+def test_journal_mode_only_wal_on_local_fs(tmp_path, fstype, mode):
+    with mock.patch("tirastore._store._detect_fstype", return_value=fstype):
+        assert Store(tmp_path / "test.db").journal_mode == mode
+
+
+@pytest.mark.parametrize("mode", ["DELETE", "WAL"])
+def test_journal_mode_override(tmp_path, mode):
+    store = Store(tmp_path / "test.db", journal_mode=mode.lower())
+    store.init_db("cpu", "2")
+    assert store.journal_mode == mode
+
+    conn = store._connect()
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0].upper() == mode
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("created, requested", [("WAL", "DELETE"), ("DELETE", "WAL")])
+def test_existing_db_keeps_recorded_journal_mode(tmp_path, capsys, created, requested):
+    Store(tmp_path / "test.db", journal_mode=created).init_db("cpu", "2")
+    store = Store(tmp_path / "test.db", journal_mode=requested)
+    store.ensure_tables()
+    assert store.journal_mode == created
+    assert "ignoring journal_mode" in capsys.readouterr().out
+    assert store.get_meta("journal_mode") == created
+
+
+def test_legacy_db_without_recorded_mode_uses_delete(tmp_path):
+    _init_store(tmp_path)
+    conn = sqlite3.connect(str(tmp_path / "test.db"))
+    with conn:
+        conn.execute("DELETE FROM db_meta WHERE key = 'journal_mode'")
+    conn.close()
+    reopened = Store(tmp_path / "test.db")
+    reopened.ensure_tables()
+    assert reopened.journal_mode == "DELETE"
+
+
+def test_get_cpu_metadata(tmp_path):
+    store = _init_store(tmp_path)
+    assert store.get_cpu_metadata() == ("cpu", "2")
+    store.set_meta("slurm_cpus", "16")
+    assert store.get_cpu_metadata()[1] == "16"
+
+
+def test_connection_pragmas(tmp_path):
+    store = _init_store(tmp_path)
+    conn = store._connect()
+    try:
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("mode, mmap_size", [("WAL", 256 * 1024 * 1024), ("DELETE", 0)])
+def test_mmap_only_under_wal(tmp_path, mode, mmap_size):
+    store = Store(tmp_path / "test.db", journal_mode=mode)
+    store.init_db("cpu", "2")
+    with store._connection() as conn:
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] == mmap_size
+    store.close()
+
+
+def test_wal_connections_are_per_thread(tmp_path):
+    store = Store(tmp_path / "test.db", journal_mode="WAL")
+    store.init_db("cpu", "2")
+
+    def current():
+        with store._connection() as conn:
+            return conn
+
+    main = current()
+    assert current() is main
+    other = []
+    thread = threading.Thread(target=lambda: other.append(current()))
+    thread.start()
+    thread.join()
+    assert other[0] is not main
+
+    store.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        main.execute("SELECT 1")
+    assert current() is not main
+    assert store.count() == 0
+
+
+def test_wal_connections_of_finished_threads_are_closed(tmp_path):
+    store = Store(tmp_path / "test.db", journal_mode="WAL")
+    store.init_db("cpu", "2")
+    opened = []
+
+    def use_store():
+        with store._connection() as conn:
+            opened.append(conn)
+
+    for _ in range(5):
+        thread = threading.Thread(target=use_store)
+        thread.start()
+        thread.join()
+    assert store.count() == 0
+    assert len(store._open_conns) == 1  # only this thread's
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    store.close()
+
+
+def test_delete_mode_connections_are_per_call(tmp_path):
+    store = Store(tmp_path / "test.db", journal_mode="DELETE")
+    store.init_db("cpu", "2")
+    with store._connection() as conn:
+        pass
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_checkpoint_truncates_wal(tmp_path):
+    store = Store(tmp_path / "test.db", journal_mode="WAL")
+    store.init_db("cpu", "2")
+    store.put_program("ph", "blur", "void blur() {}")
+    assert store.wal_size() > 0  # kept alive by the thread's open connection
+
+    busy, _, _ = store.checkpoint()
+    assert busy == 0
+    assert store.wal_size() == 0
+    assert store.program_count() == 1
+
+    with pytest.raises(ValueError, match="mode must be"):
+        store.checkpoint("SOMETIMES")
+
+
+def test_trim_wal_only_above_limit(tmp_path, monkeypatch):
+    store = Store(tmp_path / "test.db", journal_mode="WAL")
+    store.init_db("cpu", "2")
+    store.put_program("ph", "blur", "void blur() {}")
+    with mock.patch.object(store, "checkpoint", wraps=store.checkpoint) as checkpoint:
+        store.trim_wal()
+        checkpoint.assert_not_called()
+
+        monkeypatch.setattr("tirastore._store._WAL_SIZE_LIMIT", 0)
+        store.trim_wal()
+    checkpoint.assert_called_once_with("PASSIVE")  # never waits on the busy timeout
+    _, wal_frames, checkpointed = store.checkpoint("PASSIVE")
+    assert wal_frames == checkpointed
+
+
+def test_journal_mode_wal_fallback(capsys):
+    """If SQLite refuses WAL, the store falls back to DELETE and says so."""
+    store = Store(":memory:", journal_mode="WAL")  # in-memory DBs can't use WAL
+    store._connect().close()
+    assert store.journal_mode == "DELETE"
+    assert "falling back to DELETE" in capsys.readouterr().out
+
+
+def test_journal_mode_invalid(tmp_path):
+    with pytest.raises(ValueError, match="journal_mode"):
+        Store(tmp_path / "test.db", journal_mode="MEMORY")
 
 
 # ------------------------------------------------------------------
@@ -42,6 +289,47 @@ def test_put_program_idempotent(tmp_path):
     assert store.program_count() == 1
 
 
+def test_put_program_known_hash_skips_query(tmp_path, monkeypatch):
+    store = _init_store(tmp_path)
+    store.put_program("hash1", "blur", "void blur() {}")
+
+    monkeypatch.setattr(store, "_connection", None)  # Any database access would fail
+    assert not store.put_program("hash1", "blur", "void blur() {}")
+
+
+def test_compress_source(tmp_path):
+    store = Store(tmp_path / "test.db", compress_source=True)
+    store.init_db("cpu", "2")
+    big = "void big() {\n" + "    x += 1;\n" * 500 + "}"
+    store.put_program("big", "big", big)
+    store.put_program("small", "small", "void small() {}")
+    store.put_many([("k1", "s", "{}")], "big2", "n", "u", "p",
+                   program_name="big", source_code=big + " ")
+    store.put("k2", "big", "s", "{}", "n", "u", "p")
+
+    conn = store._connect()
+    try:
+        kinds = dict(conn.execute(
+            "SELECT program_hash, typeof(source_code) FROM programs"
+        ).fetchall())
+        size = conn.execute(
+            "SELECT length(source_code) FROM programs WHERE program_hash = 'big'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+    assert kinds == {"big": "blob", "big2": "blob", "small": "text"}
+    assert size < len(big) // 10
+
+    assert store.get_program("big")["source_code"] == big
+    assert [p["source_code"] for p in store.get_programs_by_name("big")] == [big, big + " "]
+    assert store.get("k2")["source_code"] == big
+    assert store.get_program_and_records("big")[0]["source_code"] == big
+    assert [src for _, src, _ in store.iter_programs_with_records()] == [big, big + " ", "void small() {}"]
+
+    # A store without compression still reads compressed rows
+    assert Store(tmp_path / "test.db").get_program("big")["source_code"] == big
+
+
 def test_get_program(tmp_path):
     store = _init_store(tmp_path)
     store.put_program("hash1", "blur", "void blur() {}")
@@ -112,6 +400,54 @@ def test_put_overwrite(tmp_path):
     assert row["hostname"] == "n2"
 
 
+def test_put_overwrite_keeps_creation_date(tmp_path, monkeypatch):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "p", "code")
+    monkeypatch.setattr("tirastore._store._now_ms", lambda: 1000)
+    store.put("k", "ph", "", '{"is_legal":false}', "n", "u", "p")
+    monkeypatch.setattr("tirastore._store._now_ms", lambda: 2000)
+    store.put("k", "ph", "", '{"is_legal":true}', "n", "u", "p", overwrite=True)
+    row = store.get("k")
+    assert (row["creation_date"], row["update_date"]) == (1000, 2000)
+
+
+def test_put_rewrites_key_deleted_elsewhere(tmp_path):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "p", "code")
+    store.put("k", "ph", "", "{}", "n", "u", "p")
+    assert not store.put("k", "ph", "", "{}", "n", "u", "p")
+
+    # Deleted by another process: the cached key must not block the insert
+    Store(store.db_path).delete("k")
+    assert store.put("k", "ph", "", "{}", "n", "u", "p")
+    assert store.put_each(
+        [("k", "ph", "", "{}", False)], "n", "u", "p"
+    ) == [False]
+    Store(store.db_path).delete("k")
+    assert store.put_each(
+        [("k", "ph", "", "{}", False)], "n", "u", "p"
+    ) == [True]
+    assert store.get("k") is not None
+
+
+def test_contains_caches_positive_answers(tmp_path):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "p", "code")
+    assert not store.contains("k1")
+
+    store.put("k1", "ph", "", "{}", "n", "u", "p")
+    # Remove the row behind the store's back: the cached answer is kept
+    conn = sqlite3.connect(str(store.db_path))
+    with conn:
+        conn.execute("DELETE FROM records WHERE key = 'k1'")
+    conn.close()
+    assert store.contains("k1")
+
+    # Deleting through the store invalidates it
+    store.delete("k1")
+    assert not store.contains("k1")
+
+
 def test_delete(tmp_path):
     store = _init_store(tmp_path)
     store.put_program("ph", "p", "code")
@@ -163,6 +499,41 @@ def test_program_dedup(tmp_path):
     assert store.program_count() == 1
 
 
+def test_program_records_use_index(tmp_path):
+    store = _init_store(tmp_path)
+    conn = store._connect()
+    try:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM records "
+            "WHERE program_hash = ? ORDER BY creation_date",
+            ("ph",),
+        ).fetchall()
+        assert any("idx_records_program" in row["detail"] for row in plan)
+        assert not any("TEMP B-TREE" in row["detail"] for row in plan)
+    finally:
+        conn.close()
+
+
+def test_stats_empty(tmp_path):
+    s = _init_store(tmp_path).stats()
+    assert s["total_records"] == 0
+    assert s["legal_records"] == 0
+    assert s["illegal_records"] == 0
+
+
+def test_stats_distinct_queries_use_indexes(tmp_path):
+    store = _init_store(tmp_path)
+    conn = store._connect()
+    try:
+        for column in ("source_project", "username"):
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT DISTINCT {column} FROM records"
+            ).fetchall()
+            assert any("COVERING INDEX" in row["detail"] for row in plan)
+    finally:
+        conn.close()
+
+
 # ------------------------------------------------------------------
 # get_programs_by_name
 # ------------------------------------------------------------------
@@ -204,6 +575,23 @@ def test_put_many(tmp_path):
     assert store.count() == 3
 
 
+def test_put_many_reads_clock_once_per_batch(tmp_path, monkeypatch):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "blur", "void blur() {}")
+    calls = []
+
+    def fake_now():
+        calls.append(None)
+        return 1_700_000_000_000 + len(calls)
+
+    monkeypatch.setattr("tirastore._store._now_ms", fake_now)
+    rows = [(f"k{i}", f"sched_{i}", "{}") for i in range(100)]
+    store.put_many(rows, "ph", "n", "u", "p")
+    assert len(calls) == 1
+    dates = {(r["creation_date"], r["update_date"]) for r in map(store.get, ("k0", "k99"))}
+    assert dates == {(1_700_000_000_001, 1_700_000_000_001)}
+
+
 def test_put_many_no_overwrite(tmp_path):
     store = _init_store(tmp_path)
     store.put_program("ph", "blur", "void blur() {}")
@@ -238,6 +626,125 @@ def test_put_many_empty(tmp_path):
     assert written == 0
 
 
+def test_put_many_duplicate_keys_in_batch(tmp_path):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "blur", "void blur() {}")
+
+    rows = [
+        ("k1", "sched_a", '{"is_legal":false}'),
+        ("k1", "sched_a", '{"is_legal":true}'),
+    ]
+    assert store.put_many(rows, "ph", "n", "u", "p") == 1
+    assert json.loads(store.get("k1")["result_json"])["is_legal"] is False
+
+    assert store.put_many(rows, "ph", "n", "u", "p", overwrite=True) == 2
+    assert json.loads(store.get("k1")["result_json"])["is_legal"] is True
+
+
+def test_put_many_with_program(tmp_path):
+    store = _init_store(tmp_path)
+    rows = [("k1", "sched_a", '{"is_legal":true}')]
+    written = store.put_many(
+        rows, "ph", "n", "u", "p", program_name="blur", source_code="void blur() {}"
+    )
+    assert written == 1
+    assert store.get_program("ph")["source_code"] == "void blur() {}"
+    assert store.get("k1")["program_name"] == "blur"
+
+    # Program already present: left untouched
+    store.put_many(rows, "ph", "n", "u", "p", program_name="other", source_code="x")
+    assert store.get_program("ph")["program_name"] == "blur"
+
+
+def test_put_many_rolls_back_on_error(tmp_path):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "blur", "void blur() {}")
+
+    rows = [
+        ("k1", "sched_a", '{"is_legal":true}'),
+        ("k2", "sched_b", None),  # violates NOT NULL
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        store.put_many(rows, "ph", "n", "u", "p")
+    assert store.count() == 0
+
+
+def test_put_many_overwrite_keeps_creation_date(tmp_path):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "blur", "void blur() {}")
+    store.put("k1", "ph", "sched_a", '{"is_legal":false}', "n", "u", "p")
+    created = store.get("k1")["creation_date"]
+
+    store.put_many([("k1", "sched_a", '{"is_legal":true}')], "ph", "n", "u", "p", overwrite=True)
+    row = store.get("k1")
+    assert row["creation_date"] == created
+    assert row["update_date"] >= created
+
+
+def test_existing_keys(tmp_path):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "blur", "void blur() {}")
+    rows = [(f"k{i}", f"sched_{i}", "{}") for i in range(0, 2000, 2)]
+    store.put_many(rows, "ph", "n", "u", "p")
+
+    # More keys than fit in one IN (...) query
+    probe = [f"k{i}" for i in range(2000)]
+    found = store.existing_keys(probe)
+    assert found == {f"k{i}" for i in range(0, 2000, 2)}
+    assert store.existing_keys([]) == set()
+
+
+def test_existing_keys_reuses_statement_text(tmp_path):
+    store = _init_store(tmp_path)
+    conn = store._connect()
+    statements = []
+
+    class Recorder:
+        def execute(self, sql, params):
+            statements.append(sql)
+            return conn.execute(sql, params)
+
+    try:
+        assert store._select_existing(Recorder(), ["a", "b", "c"]) == set()
+        store._select_existing(Recorder(), ["a", "b", "c", "d"])
+        store._select_existing(Recorder(), ["a", "b", "c", "d", "e"])
+    finally:
+        conn.close()
+    assert len(statements) == 3
+    assert statements[0] == statements[1] != statements[2]
+
+
+def test_get_many(tmp_path):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "blur", "void blur() {}")
+    rows = [(f"k{i}", f"sched_{i}", "{}") for i in range(0, 2000, 2)]
+    store.put_many(rows, "ph", "n", "u", "p")
+
+    found = store.get_many([f"k{i}" for i in range(2000)])
+    assert set(found) == {f"k{i}" for i in range(0, 2000, 2)}
+    assert found["k4"]["schedule"] == "sched_4"
+    assert store.get_many([]) == {}
+
+
+def test_existing_keys_served_from_cache(tmp_path, monkeypatch):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "blur", "void blur() {}")
+    store.put_many([("k1", "s1", "{}"), ("k2", "s2", "{}")], "ph", "n", "u", "p")
+
+    monkeypatch.setattr(store, "_connection", None)  # Any database access would fail
+    assert store.existing_keys(["k1", "k2"]) == {"k1", "k2"}
+
+
+def test_existing_keys_uncached_sees_deletions_elsewhere(tmp_path):
+    store = _init_store(tmp_path)
+    store.put_program("ph", "blur", "void blur() {}")
+    store.put_many([("k1", "s1", "{}"), ("k2", "s2", "{}")], "ph", "n", "u", "p")
+    Store(store.db_path).delete("k1")
+
+    assert store.existing_keys(["k1", "k2"]) == {"k1", "k2"}  # stale
+    assert store.existing_keys(["k1", "k2"], cached=False) == {"k2"}
+
+
 # ------------------------------------------------------------------
 # get_records_by_program_hash
 # ------------------------------------------------------------------
@@ -265,6 +772,40 @@ def test_get_records_by_program_hash_empty(tmp_path):
     assert store.get_records_by_program_hash("nonexistent") == []
 
 
+def test_get_program_and_records(tmp_path):
+    store = _init_store(tmp_path)
+    store.put_program("ph1", "blur", "void blur() {}")
+    store.put_program("ph2", "edge", "void edge() {}")
+    store.put("k1", "ph1", "sched_a", '{"is_legal":true}', "n", "u", "p")
+    store.put("k2", "ph1", "sched_b", '{"is_legal":false}', "n", "u", "p")
+
+    program, records = store.get_program_and_records("ph1")
+    assert program["source_code"] == "void blur() {}"
+    assert [r["key"] for r in records] == ["k1", "k2"]
+    assert store.get_program_and_records("ph2") == (
+        {"program_hash": "ph2", "program_name": "edge", "source_code": "void edge() {}"},
+        [],
+    )
+    assert store.get_program_and_records("nonexistent") is None
+
+
+def test_iter_records_by_program_hash(tmp_path):
+    store = _init_store(tmp_path)
+    store.put_program("ph1", "blur", "void blur() {}")
+    store.put_program("ph2", "edge", "void edge() {}")
+
+    store.put("k1", "ph1", "sched_a", '{"is_legal":true}', "n", "u", "p")
+    store.put("k2", "ph1", "sched_b", '{"is_legal":false}', "n", "u", "p")
+    store.put("k3", "ph2", "sched_a", '{"is_legal":true}', "n", "u", "p")
+
+    rows = list(store.iter_records_by_program_hash("ph1"))
+    assert [r["key"] for r in rows] == [
+        r["key"] for r in store.get_records_by_program_hash("ph1")
+    ]
+    assert "source_code" not in rows[0].keys()
+    assert list(store.iter_records_by_program_hash("nonexistent")) == []
+
+
 # ------------------------------------------------------------------
 # get_all_programs_with_records
 # ------------------------------------------------------------------
@@ -295,3 +836,24 @@ def test_get_all_programs_with_records(tmp_path):
 def test_get_all_programs_with_records_empty(tmp_path):
     store = _init_store(tmp_path)
     assert store.get_all_programs_with_records() == []
+
+
+@pytest.mark.parametrize("batch_size", [1, 1000])
+def test_iter_programs_with_records(tmp_path, batch_size):
+    store = _init_store(tmp_path)
+    store.put_program("ph1", "blur", "void blur() {}")
+    store.put_program("ph2", "blur", "void blur2() {}")
+    store.put_program("ph3", "edge", "void edge() {}")
+
+    store.put("k1", "ph1", "sched_a", '{"is_legal":true}', "n", "u", "p")
+    store.put("k2", "ph1", "sched_b", '{"is_legal":false}', "n", "u", "p")
+    store.put("k3", "ph2", "sched_a", '{"is_legal":true}', "n", "u", "p")
+
+    streamed = list(store.iter_programs_with_records(batch_size=batch_size))
+    expected = [
+        (e["program_name"], e["source_code"],
+         [(r["schedule"], r["result_json"]) for r in e["records"]])
+        for e in store.get_all_programs_with_records()
+    ]
+    assert streamed == expected
+    assert streamed[2] == ("edge", "void edge() {}", [])
@@ -1,12 +1,18 @@
 """Integration tests for the TiraStore high-level API."""
 
 import json
+import math
 import os
+import sqlite3
+import stat
+import threading
+from datetime import datetime
 from unittest import mock
 
 import pytest
 
 from tirastore import LookupResult, TiraStore
+from tirastore._keys import make_key, make_program_hash
 
 # A few valid schedule strings for use in tests
 _SCHED_A = "R(L0,comps=['c1'])"
@@ -63,6 +69,69 @@ def test_record_illegal(store):
     assert result is not None
     assert result.is_legal is False
     assert result.execution_times is None
+    row = store.get(store.keys()[0])
+    assert json.loads(row["result_json"]) == {"is_legal": False, "execution_times": None}
+
+
+def test_record_non_finite_times(store):
+    nan, inf = float("nan"), float("inf")
+    assert store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[nan, 0.5])
+    assert store.record_many("p", "c", [
+        {"tiralib_schedule_string": _SCHED_B, "is_legal": True, "execution_times": [inf]},
+    ]) == 1
+    assert store.record_batch([
+        {"program_name": "q", "program_source_code": "d", "tiralib_schedule_string": _SCHED_A,
+         "is_legal": False, "execution_times": None},
+    ]) == 1
+
+    result = store.lookup("p", "c", _SCHED_A)
+    assert math.isnan(result.execution_times[0]) and result.execution_times[1] == 0.5
+    assert store.lookup_stats("p", "c", [_SCHED_B]) == [(True, inf, inf)]
+    stats = store.stats()
+    assert (stats["total_records"], stats["legal_records"], stats["illegal_records"]) == (3, 2, 1)
+
+
+@pytest.mark.parametrize("writer_has_orjson", [True, False])
+def test_non_finite_times_shared_across_json_backends(tmp_path, monkeypatch, writer_has_orjson):
+    from tirastore import _json
+
+    if _json.orjson is None:
+        pytest.skip("orjson not installed")
+    db = tmp_path / "test.db"
+    with monkeypatch.context() as m:
+        if not writer_has_orjson:
+            m.setattr(_json, "orjson", None)
+        writer = TiraStore(db, cpu_model="c", slurm_cpus="1")
+        writer.record("p", "c", _SCHED_A, is_legal=True, execution_times=[float("inf"), 0.5])
+        writer.close()
+
+    if writer_has_orjson:
+        monkeypatch.setattr(_json, "orjson", None)
+    reader = TiraStore(db, cpu_model="c", slurm_cpus="1", lookup_cache_size=0)
+    assert reader.lookup("p", "c", _SCHED_A).execution_times == [float("inf"), 0.5]
+    assert reader.lookup_stats("p", "c", [_SCHED_A]) == [(True, 0.5, float("inf"))]
+    assert reader.stats()["legal_records"] == 1
+
+
+def test_reads_iso_dates_written_by_pre_v3_clients(store):
+    store.record("p", "c", _SCHED_A, is_legal=False)
+    key = make_key(make_program_hash("c"), _SCHED_B)
+    conn = sqlite3.connect(str(store.db_path))
+    with conn:
+        # As written by a client that predates the millisecond dates
+        conn.execute(
+            "INSERT INTO records VALUES (?, ?, ?, ?, 'n', 'u', ?, ?, '')",
+            (key, make_program_hash("c"), _SCHED_B,
+             '{"is_legal":false,"execution_times":null}',
+             "2026-02-21T15:30:12.123456+00:00", "2026-02-22T00:00:00+00:00"),
+        )
+    conn.close()
+
+    result = store.lookup("p", "c", _SCHED_B)
+    assert result.creation_date == "2026-02-21T15:30:12.123+00:00"
+    assert result.update_date == "2026-02-22T00:00:00.000+00:00"
+    assert store.get(key)["creation_date"] == result.creation_date
+    assert len(store.get_program_records("p", "c")) == 2
 
 
 def test_record_legal_requires_times(store):
@@ -291,6 +360,91 @@ def test_cpu_mismatch_override(tmp_path):
     store.record("p", "c", _EMPTY, is_legal=False)
 
 
+def test_cpu_model_env_override(tmp_path, monkeypatch):
+    db = tmp_path / "test.db"
+    monkeypatch.setenv("TIRASTORE_CPU_MODEL", "Env CPU")
+    cpuinfo = mock.Mock()
+    with mock.patch.dict("sys.modules", {"cpuinfo": cpuinfo}):
+        store = TiraStore(db, slurm_cpus="8")
+        assert store.cpu_model == "Env CPU"
+        assert TiraStore(db, slurm_cpus="8").writes_allowed
+    cpuinfo.get_cpu_info.assert_not_called()
+
+    monkeypatch.setenv("TIRASTORE_CPU_MODEL", "Other CPU")
+    assert not TiraStore(db, slurm_cpus="8").writes_allowed
+
+
+def test_cpu_model_detected_once_per_process(monkeypatch):
+    from tirastore.tirastore import _detect_cpu_model, _get_cpu_model
+
+    monkeypatch.delenv("TIRASTORE_CPU_MODEL", raising=False)
+    cpuinfo = mock.Mock()
+    cpuinfo.get_cpu_info.return_value = {"brand_raw": "Probed CPU"}
+    _detect_cpu_model.cache_clear()
+    try:
+        with mock.patch.dict("sys.modules", {"cpuinfo": cpuinfo}):
+            assert _get_cpu_model() == "Probed CPU"
+            assert _get_cpu_model() == "Probed CPU"
+        cpuinfo.get_cpu_info.assert_called_once()
+        monkeypatch.setenv("TIRASTORE_CPU_MODEL", "Env CPU")
+        assert _get_cpu_model() == "Env CPU"
+    finally:
+        _detect_cpu_model.cache_clear()
+
+
+def test_new_db_probes_cpu_once(tmp_path):
+    with mock.patch("tirastore.tirastore._get_cpu_model", return_value="Probed") as probe:
+        store = TiraStore(tmp_path / "test.db", slurm_cpus="4")
+        assert store.cpu_model == "Probed"
+        assert store.writes_allowed
+    probe.assert_called_once()
+
+
+@pytest.mark.parametrize("mode", ["WAL", "DELETE"])
+def test_reopening_skips_validation(tmp_path, mode):
+    db = tmp_path / "test.db"
+    TiraStore(db, cpu_model="CPU_A", slurm_cpus="4", journal_mode=mode)
+    with mock.patch("tirastore.tirastore.HardLinkLock.acquire") as acquire, \
+            mock.patch("tirastore.tirastore.Store.ensure_tables") as ensure_tables:
+        same = TiraStore(db, cpu_model="CPU_A", slurm_cpus="4", journal_mode=mode)
+        other = TiraStore(db, cpu_model="CPU_B", slurm_cpus="4", journal_mode=mode)
+    assert acquire.called is (mode == "DELETE")  # only to read created_at
+    ensure_tables.assert_not_called()
+    assert same.writes_allowed and same.journal_mode == mode
+    assert not other.writes_allowed
+    assert same.record("p", "c", _SCHED_A, is_legal=False)
+
+
+def test_reopening_with_other_journal_mode_warns(tmp_path, capsys):
+    db = tmp_path / "test.db"
+    TiraStore(db, cpu_model="c", slurm_cpus="1", journal_mode="WAL")
+    store = TiraStore(db, cpu_model="c", slurm_cpus="1", journal_mode="DELETE")
+    assert store.journal_mode == "WAL"
+    assert "ignoring journal_mode='DELETE'" in capsys.readouterr().out
+
+
+def test_recreated_db_with_reused_inode_is_validated(tmp_path):
+    db = tmp_path / "test.db"
+    with mock.patch.object(TiraStore, "_db_identity", return_value=("same inode",)):
+        TiraStore(db, cpu_model="CPU_A", slurm_cpus="4")
+        db.unlink()
+        TiraStore(db, cpu_model="CPU_B", slurm_cpus="4")
+        store = TiraStore(db, cpu_model="CPU_A", slurm_cpus="4")
+    assert not store.writes_allowed
+
+
+def test_machine_info_detected_lazily(tmp_path):
+    db = tmp_path / "test.db"
+    TiraStore(db, cpu_model="CPU_A", slurm_cpus="4")
+    with mock.patch("tirastore.tirastore.socket") as sock:
+        sock.gethostname.return_value = "node42"
+        store = TiraStore(db, cpu_model="CPU_A", slurm_cpus="4")
+        store.lookup("p", "c", _EMPTY)
+        sock.gethostname.assert_not_called()
+        store.record("p", "c", _EMPTY, is_legal=False)
+    assert store.get(store.keys()[0])["hostname"] == "node42"
+
+
 # ------------------------------------------------------------------
 # Metadata properties
 # ------------------------------------------------------------------
@@ -304,11 +458,218 @@ def test_slurm_cpus_property(store):
     assert store.slurm_cpus == "4"
 
 
+def test_journal_mode_property(tmp_path):
+    store = TiraStore(tmp_path / "test.db", cpu_model="c", slurm_cpus="1", journal_mode="DELETE")
+    assert store.journal_mode == "DELETE"
+
+
+@pytest.mark.parametrize("mode, lock_used", [("WAL", False), ("DELETE", True)])
+def test_writes_take_lock_only_without_wal(tmp_path, mode, lock_used):
+    store = TiraStore(tmp_path / "test.db", cpu_model="c", slurm_cpus="1", journal_mode=mode)
+    with mock.patch.object(store._lock, "acquire") as acquire, \
+            mock.patch.object(store._lock, "release"):
+        store.record("p", "c", _SCHED_A, is_legal=False)
+        store.record_many("p", "c", [{"tiralib_schedule_string": _SCHED_B, "is_legal": False}])
+        store.delete(store.keys()[0])
+    assert acquire.called is lock_used
+    assert store.count() == 1
+
+
+def test_concurrent_wal_writers(tmp_path):
+    """Writers on separate connections serialize on SQLite's lock alone."""
+    db = tmp_path / "test.db"
+    TiraStore(db, cpu_model="c", slurm_cpus="1", journal_mode="WAL")
+    errors = []
+
+    def worker(n):
+        try:
+            store = TiraStore(db, cpu_model="c", slurm_cpus="1", journal_mode="WAL")
+            for i in range(20):
+                store.record_many(f"p{n}", f"void p{n}() {{}}", [
+                    {"tiralib_schedule_string": f"U(L0,{i},comps=['c{n}'])", "is_legal": False},
+                    {"tiralib_schedule_string": f"U(L1,{i},comps=['c{n}'])", "is_legal": False},
+                ])
+                store.record(f"p{n}", f"void p{n}() {{}}", f"U(L2,{i},comps=['c{n}'])", is_legal=False)
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert TiraStore(db, cpu_model="c", slurm_cpus="1").count() == 4 * 20 * 3
+
+
+@pytest.mark.parametrize("mode, lock_used", [("WAL", False), ("DELETE", True)])
+def test_reads_take_lock_only_without_wal(tmp_path, mode, lock_used):
+    store = TiraStore(tmp_path / "test.db", cpu_model="c", slurm_cpus="1", journal_mode=mode)
+    store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[0.5])
+    with mock.patch.object(store._lock, "acquire") as acquire, \
+            mock.patch.object(store._lock, "release"):
+        assert store.lookup("p", "c", _SCHED_A) is not None
+        assert store.contains("p", "c", _SCHED_A)
+        assert store.count() == 1
+        assert store.program_count() == 1
+        assert store.stats()["total_records"] == 1
+        key = store.keys()[0]
+        assert store.get(key) is not None
+        assert store.lookup_many("p", "c", [_SCHED_A, _SCHED_B])[1] is None
+        assert store.cpu_model == "c"
+        assert store.slurm_cpus == "1"
+    assert acquire.called is lock_used
+
+
+def test_lookup_many(store):
+    store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[0.5])
+    store.record("p", "c", _SCHED_B, is_legal=False)
+    store.lookup("p", "c", _SCHED_A)  # cached
+
+    with mock.patch.object(store._store, "get_many", wraps=store._store.get_many) as get_many:
+        results = store.lookup_many("p", "c", [_SCHED_B, "U(L0,4,comps=['c1'])", _SCHED_A, _SCHED_B])
+    get_many.assert_called_once()
+    assert len(get_many.call_args.args[0]) == 2  # _SCHED_A came from the cache
+
+    assert [r is None for r in results] == [False, True, False, False]
+    assert results[0].is_legal is False
+    assert results[2] == store.lookup("p", "c", _SCHED_A)
+    assert results[0] is not results[3]
+    assert store.lookup_many("p", "c", []) == []
+
+
+def test_lookup_stats(store):
+    store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[0.5, 0.25, 0.75])
+    store.record("p", "c", _SCHED_B, is_legal=False)
+    stats = store.lookup_stats("p", "c", [_SCHED_A, "U(L0,4,comps=['c1'])", _SCHED_B, _SCHED_A])
+    assert stats == [(True, 0.25, 0.5), None, (False, None, None), (True, 0.25, 0.5)]
+    assert store.lookup_stats("p", "c", []) == []
+
+
+def test_preload_serves_lookups_from_cache(store):
+    store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[0.5])
+    store.record("p", "c", _SCHED_B, is_legal=False)
+    store.record("q", "d", _SCHED_A, is_legal=False)
+    store._lookup_cache.clear()
+
+    assert store.preload("p", "c") == 2
+    with mock.patch.object(store._store, "_connection") as conn:
+        assert store.lookup("p", "c", _SCHED_A).execution_times == [0.5]
+        assert store.lookup_many("p", "c", [_SCHED_B])[0].is_legal is False
+    conn.assert_not_called()
+    assert store.preload("missing", "x") == 0
+
+
+def test_lookup_skips_program_source(store):
+    store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[0.5])
+    store._lookup_cache.clear()
+    with mock.patch.object(store._store, "get", side_effect=AssertionError), \
+            mock.patch("tirastore._store._decode_source", side_effect=AssertionError):
+        result = store.lookup("p", "c", _SCHED_A)
+    assert result.execution_times == [0.5]
+    assert result.schedule == _SCHED_A
+
+
+def test_lookup_cache_serves_repeat_hits(store):
+    store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[0.5])
+    first = store.lookup("p", "c", _SCHED_A)
+    with mock.patch.object(store._store, "get_result") as get_result:
+        second = store.lookup("p", "c", _SCHED_A)
+    get_result.assert_not_called()
+    assert second == first
+    second.execution_times.append(9.0)
+    assert store.lookup("p", "c", _SCHED_A).execution_times == [0.5]
+
+
+def test_contains_answers_from_lookup_cache(store):
+    store.record("p", "c", _SCHED_A, is_legal=False)
+    store.lookup("p", "c", _SCHED_A)
+    with mock.patch.object(store, "_read_guard") as read_guard:
+        assert store.contains("p", "c", _SCHED_A)
+    read_guard.assert_not_called()
+
+
+def test_contains_many(store):
+    store.record("p", "c", _SCHED_A, is_legal=False)
+    store.record("p", "c", _SCHED_B, is_legal=False)
+    store.lookup("p", "c", _SCHED_A)  # cached
+    other = "U(L0,4,comps=['c1'])"
+    with mock.patch.object(store._store, "existing_keys", wraps=store._store.existing_keys) as existing:
+        assert store.contains_many("p", "c", [_SCHED_B, other, _SCHED_A, _SCHED_B]) == [True, False, True, True]
+    existing.assert_called_once()
+    assert len(existing.call_args.args[0]) == 2  # _SCHED_A came from the cache
+    assert store.contains_many("p", "c", []) == []
+
+
+def test_lookup_cache_evicted_when_record_many_rewrites_key(store):
+    store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[0.5])
+    assert store.lookup("p", "c", _SCHED_A).execution_times == [0.5]
+    # Deleted behind the lookup cache, as by another process
+    store._store.delete(make_key(make_program_hash("c"), _SCHED_A))
+    schedules = [{"tiralib_schedule_string": _SCHED_A, "is_legal": True, "execution_times": [0.25]}]
+    assert store.record_many("p", "c", schedules, overwrite=False) == 1
+    assert store.lookup("p", "c", _SCHED_A).execution_times == [0.25]
+
+
+def test_lookup_cache_does_not_keep_misses(store):
+    assert store.lookup("p", "c", _SCHED_A) is None
+    store.record("p", "c", _SCHED_A, is_legal=False)
+    assert store.lookup("p", "c", _SCHED_A) is not None
+
+
+def test_lookup_cache_invalidated_by_writes(store):
+    store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[0.5])
+    store.lookup("p", "c", _SCHED_A)
+
+    store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[0.7], overwrite=True)
+    assert store.lookup("p", "c", _SCHED_A).execution_times == [0.7]
+
+    store.record_many("p", "c", [
+        {"tiralib_schedule_string": _SCHED_A, "is_legal": False},
+    ], overwrite=True)
+    assert store.lookup("p", "c", _SCHED_A).is_legal is False
+
+    store.delete(store.keys()[0])
+    assert store.lookup("p", "c", _SCHED_A) is None
+
+
+def test_lookup_cache_disabled(tmp_path):
+    store = TiraStore(tmp_path / "test.db", cpu_model="c", slurm_cpus="1", lookup_cache_size=0)
+    store.record("p", "c", _SCHED_A, is_legal=False)
+    store.lookup("p", "c", _SCHED_A)
+    assert len(store._lookup_cache) == 0
+
+
+@pytest.mark.parametrize("mode", ["WAL", "DELETE"])
+def test_checkpoint(tmp_path, mode):
+    store = TiraStore(tmp_path / "test.db", cpu_model="c", slurm_cpus="1", journal_mode=mode)
+    store.record("p", "c", _SCHED_A, is_legal=False)
+    assert store.checkpoint() is True
+    assert not os.path.exists(f"{store.db_path}-wal") or os.path.getsize(f"{store.db_path}-wal") == 0
+    assert store.count() == 1
+
+
+def test_close_and_context_manager(tmp_path):
+    with TiraStore(tmp_path / "test.db", cpu_model="c", slurm_cpus="1") as store:
+        store.record("p", "c", _SCHED_A, is_legal=False)
+    # Still usable after close()
+    assert store.count() == 1
+    store.close()
+
+
 # ------------------------------------------------------------------
 # LookupResult
 # ------------------------------------------------------------------
 
 
+def test_lookup_result_has_no_instance_dict(store):
+    store.record("p", "c", _SCHED_A, is_legal=False)
+    result = store.lookup("p", "c", _SCHED_A)
+    assert not hasattr(result, "__dict__")
+    with pytest.raises(AttributeError):
+        result.extra = 1
+
+
 def test_lookup_result_to_dict(store):
     store.record("p", "c", _SCHED_A, is_legal=True, execution_times=[0.5])
     result = store.lookup("p", "c", _SCHED_A)
@@ -319,6 +680,17 @@ def test_lookup_result_to_dict(store):
     assert "username" in d
 
 
+def test_lookup_result_dates_are_iso(store):
+    store.record("p", "c", _SCHED_A, is_legal=False)
+    result = store.lookup("p", "c", _SCHED_A)
+    created = datetime.fromisoformat(result.creation_date)
+    assert created.tzinfo is not None
+    assert result.update_date == result.creation_date
+
+    row = store.get(store.keys()[0])
+    assert row["creation_date"] == result.creation_date
+
+
 # ------------------------------------------------------------------
 # Repr
 # ------------------------------------------------------------------
@@ -378,6 +750,38 @@ def test_record_many_no_overwrite(store):
     assert store.count() == 2
 
 
+def test_record_many_resubmission_skips_write(store):
+    schedules = [
+        {"tiralib_schedule_string": _SCHED_A, "is_legal": False},
+        {"tiralib_schedule_string": _SCHED_B, "is_legal": False},
+    ]
+    assert store.record_many("blur", "void blur() {}", schedules) == 2
+    with mock.patch.object(store._store, "put_records") as put_records, \
+            mock.patch.object(store._store, "transaction") as transaction, \
+            mock.patch.object(store, "_write_guard") as write_guard:
+        assert store.record_many("blur", "void blur() {}", schedules) == 0
+    put_records.assert_not_called()
+    transaction.assert_not_called()
+    write_guard.assert_not_called()
+
+
+def test_record_many_empty_registers_program(store):
+    assert store.record_many("blur", "void blur() {}", []) == 0
+    assert [p["source_code"] for p in store.get_program_source("blur")] == ["void blur() {}"]
+
+
+def test_record_many_rewrites_records_deleted_elsewhere(store):
+    schedules = [
+        {"tiralib_schedule_string": _SCHED_A, "is_legal": False},
+        {"tiralib_schedule_string": _SCHED_B, "is_legal": False},
+    ]
+    assert store.record_many("blur", "void blur() {}", schedules) == 2
+    other = TiraStore(store.db_path, cpu_model="TestCPU", slurm_cpus="4")
+    other.delete(other.keys()[0])
+    assert store.record_many("blur", "void blur() {}", schedules) == 1
+    assert store.count() == 2
+
+
 def test_record_many_overwrite(store):
     store.record("blur", "void blur() {}", _SCHED_A, is_legal=False)
     schedules = [
@@ -403,6 +807,75 @@ def test_record_many_cpu_mismatch(tmp_path):
         store2.record_many("p", "c", [{"tiralib_schedule_string": "", "is_legal": False}])
 
 
+def test_record_batch_spans_programs_in_one_lock(tmp_path):
+    store = TiraStore(tmp_path / "test.db", cpu_model="c", slurm_cpus="1", journal_mode="DELETE")
+    entries = [
+        {"program_name": "blur", "program_source_code": "void blur() {}",
+         "tiralib_schedule_string": _SCHED_A, "is_legal": True, "execution_times": [0.5]},
+        {"program_name": "conv", "program_source_code": "void conv() {}",
+         "tiralib_schedule_string": _SCHED_A, "is_legal": False},
+        {"program_name": "blur", "program_source_code": "void blur() {}",
+         "tiralib_schedule_string": _SCHED_B, "is_legal": False},
+    ]
+    with mock.patch.object(store._lock, "acquire", wraps=store._lock.acquire) as acquire:
+        assert store.record_batch(entries) == 3
+    assert acquire.call_count == 2  # one existence check, one write
+    assert store.program_count() == 2
+    assert store.record_batch(entries) == 0
+
+    with mock.patch.object(store._lock, "acquire", wraps=store._lock.acquire) as acquire:
+        results = store.lookup_batch([
+            ("conv", "void conv() {}", _SCHED_A),
+            ("conv", "void conv() {}", _SCHED_B),
+            ("blur", "void blur() {}", _SCHED_A),
+        ])
+    assert acquire.call_count == 1
+    assert [r is None for r in results] == [False, True, False]
+    assert results[0].is_legal is False
+    assert results[2].execution_times == [0.5]
+
+
+def test_record_batch_validates_all_before_writing(store):
+    entries = [
+        {"program_name": "p", "program_source_code": "c",
+         "tiralib_schedule_string": _SCHED_A, "is_legal": False},
+        {"program_name": "q", "program_source_code": "d",
+         "tiralib_schedule_string": "BOGUS", "is_legal": False},
+    ]
+    with pytest.raises(ValueError, match=r"entries\[1\]"):
+        store.record_batch(entries)
+    assert store.count() == 0
+    assert store.program_count() == 0
+
+
+@pytest.mark.parametrize("mode", ["WAL", "DELETE"])
+def test_record_async_group_commits(tmp_path, mode):
+    store = TiraStore(tmp_path / "test.db", cpu_model="c", slurm_cpus="1", journal_mode=mode)
+    store.record("p", "c", _SCHED_B, is_legal=False)
+    with mock.patch.object(store._store, "put_each", wraps=store._store.put_each) as put_each:
+        futures = [
+            store.record_async("p", "c", _SCHED_A, is_legal=True, execution_times=[0.5]),
+            store.record_async("p", "c", _SCHED_A, is_legal=True, execution_times=[0.7]),
+            store.record_async("p", "c", _SCHED_B, is_legal=False),
+            store.record_async("q", "d", _SCHED_A, is_legal=False),
+            store.record_async("p", "c", _SCHED_B, is_legal=True, execution_times=[0.1], overwrite=True),
+        ]
+        store.close()
+    assert [f.result(timeout=5) for f in futures] == [True, False, False, True, True]
+    assert put_each.call_count < len(futures)
+    assert store.lookup("p", "c", _SCHED_A).execution_times == [0.5]
+    assert store.lookup("p", "c", _SCHED_B).is_legal is True
+    assert store.program_count() == 2
+
+
+def test_record_async_validates_upfront(store):
+    with pytest.raises(ValueError, match="Invalid schedule"):
+        store.record_async("p", "c", "BOGUS", is_legal=False)
+    with pytest.raises(ValueError, match="execution_times"):
+        store.record_async("p", "c", _SCHED_A, is_legal=True)
+    assert store._writer is None
+
+
 # ------------------------------------------------------------------
 # get_program_source
 # ------------------------------------------------------------------
@@ -486,6 +959,16 @@ def test_get_program_records_isolates_programs(store):
     assert len(edge_records) == 1
 
 
+def test_get_program_details(store):
+    store.record("blur", "void blur() {}", _SCHED_A, is_legal=False)
+    store.record("blur", "void blur() {}", _SCHED_B, is_legal=True, execution_times=[0.3])
+
+    source, records = store.get_program_details("blur", "// c\nvoid blur() {}")
+    assert source == "void blur() {}"
+    assert records == store.get_program_records("blur", "void blur() {}")
+    assert store.get_program_details("edge", "void edge() {}") is None
+
+
 # ------------------------------------------------------------------
 # backup
 # ------------------------------------------------------------------
@@ -511,6 +994,41 @@ def test_backup_custom_path(store, tmp_path):
     backup = store.backup(dest)
     assert backup == dest.resolve()
     assert backup.exists()
+    # Shared like the database itself, whatever the umask
+    assert stat.S_IMODE(backup.stat().st_mode) == 0o666
+
+
+def test_backup_includes_uncheckpointed_wal(tmp_path):
+    store = TiraStore(tmp_path / "test.db", cpu_model="c", slurm_cpus="1", journal_mode="WAL")
+    # An open connection keeps the last close from checkpointing the WAL.
+    holder = sqlite3.connect(str(store.db_path))
+    holder.execute("SELECT 1 FROM db_meta").fetchall()
+    try:
+        store.record("blur", "void blur() {}", _SCHED_A, is_legal=False)
+        assert os.path.getsize(f"{store.db_path}-wal") > 0
+        backup = store.backup(tmp_path / "copy.db")
+    finally:
+        holder.close()
+    store2 = TiraStore(backup, cpu_model="c", slurm_cpus="1")
+    assert store2.count() == 1
+
+
+def test_backup_does_not_wait_for_writers_under_wal(tmp_path):
+    store = TiraStore(tmp_path / "test.db", cpu_model="c", slurm_cpus="1", journal_mode="WAL")
+    store.record("blur", "void blur() {}", _SCHED_A, is_legal=False)
+    writer = sqlite3.connect(str(store.db_path), isolation_level=None)
+    try:
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("DELETE FROM records")
+        with mock.patch.object(store._lock, "acquire") as acquire:
+            backup = store.backup(tmp_path / "copy.db")
+        acquire.assert_not_called()
+        writer.execute("ROLLBACK")
+    finally:
+        writer.close()
+    # The copy holds the last committed state, not the open transaction's
+    store2 = TiraStore(backup, cpu_model="c", slurm_cpus="1")
+    assert store2.count() == 1
 
 
 # ------------------------------------------------------------------
@@ -582,6 +1100,28 @@ def test_export_multiple_versions(store, tmp_path):
     assert data["blur_v2"]["program_name"] == "blur"
 
 
+def test_export_version_keys_follow_stream(store, tmp_path):
+    for name, source in [("blur", "void b1() {}"), ("edge", "void e() {}"),
+                         ("blur", "void b2() {}"), ("axpy", "void a() {}"),
+                         ("blur", "void b3() {}")]:
+        store.record(name, source, _SCHED_A, is_legal=False)
+    out = tmp_path / "export.jsonl"
+    store.export(out, fmt="jsonl")
+    keys = [next(iter(json.loads(line))) for line in out.read_text().splitlines()]
+    assert keys == ["axpy", "blur_v1", "blur_v2", "blur_v3", "edge"]
+
+
+def test_export_json_matches_indented_dump(store, tmp_path):
+    """The streamed JSON is byte-identical to json.dump(..., indent=2)."""
+    _populate_for_export(store)
+    store.record("blur", "void blur_v2() {}\n// é", _SCHED_A, is_legal=False)
+    out = tmp_path / "export.json"
+    store.export(out, fmt="json")
+    text = out.read_text(encoding="utf-8")
+    expected = json.dumps(json.loads(text), indent=2, ensure_ascii=False) + "\n"
+    assert text == expected
+
+
 def test_export_empty_db(store, tmp_path):
     out = tmp_path / "export.json"
     store.export(out, fmt="json")
@@ -0,0 +1,97 @@
+"""Tests for the background group-commit writer."""
+
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from tirastore._writer import GroupWriter
+
+
+def test_batches_queued_items():
+    batches = []
+
+    def commit(items):
+        batches.append(items)
+        return [item * 10 for item in items]
+
+    writer = GroupWriter(commit, max_batch=3, max_wait=5.0)
+    futures = [writer.submit(i) for i in range(7)]
+    writer.close()  # flushes the last, partial batch without waiting
+    assert [f.result(timeout=1) for f in futures] == [i * 10 for i in range(7)]
+    assert [len(b) for b in batches] == [3, 3, 1]
+
+
+def test_commit_error_fails_the_whole_batch():
+    def commit(items):
+        raise RuntimeError("disk full")
+
+    writer = GroupWriter(commit, max_batch=2, max_wait=5.0)
+    futures = [writer.submit(i) for i in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="disk full"):
+            future.result(timeout=1)
+    writer.close()
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_base_exception_resolves_pending_futures():
+    started = threading.Event()
+    release = threading.Event()
+
+    def commit(items):
+        started.set()
+        release.wait(timeout=5)
+        raise SystemExit
+
+    writer = GroupWriter(commit, max_batch=1, max_wait=0.0)
+    first = writer.submit(1)
+    started.wait(timeout=5)
+    second = writer.submit(2)  # still queued when the thread dies
+    release.set()
+    with pytest.raises(SystemExit):
+        first.result(timeout=1)
+    with pytest.raises(RuntimeError, match="stopped"):
+        second.result(timeout=1)
+    assert writer.stopped
+    with pytest.raises(RuntimeError, match="closed"):
+        writer.submit(3)
+    writer.close()
+
+
+def test_pending_items_flushed_at_exit():
+    code = (
+        "import time\n"
+        "from tirastore._writer import GroupWriter\n"
+        "def commit(items):\n"
+        "    time.sleep(0.2)\n"
+        "    print('committed', items, flush=True)\n"
+        "    return items\n"
+        "GroupWriter(commit, max_wait=0.0).submit(1)\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, timeout=30
+    ).stdout
+    assert "committed [1]" in out
+
+
+def test_cancelled_items_are_skipped():
+    committed = []
+
+    def commit(items):
+        committed.extend(items)
+        return [None] * len(items)
+
+    writer = GroupWriter(commit, max_wait=0.0)
+    writer._queue.put(("a", _cancelled_future()))
+    writer.submit("b").result(timeout=1)
+    writer.close()
+    assert committed == ["b"]
+
+
+def _cancelled_future():
+    future = Future()
+    future.cancel()
+    return future
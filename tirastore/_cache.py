@@ -0,0 +1,62 @@
+"""Small in-process caches for TiraStore.
+
+The database is shared by many processes on many nodes, so these caches only
+ever hold facts that stay true once observed (e.g. "program X is stored") or
+that the owning process invalidates itself when it writes.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of entries.  ``0`` disables the cache: lookups always
+        miss and insertions are ignored.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._mutex = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._mutex:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._mutex:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._mutex:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._mutex:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_MISSING = object()
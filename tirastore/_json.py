@@ -0,0 +1,48 @@
+"""Compact JSON encoding and decoding for stored results.
+
+Uses `orjson <https://pypi.org/project/orjson/>`_ when it is installed
+(``pip install "tirastore[fast]"``) and the standard library otherwise.
+Both produce compact JSON that decodes to the same values.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def dumps(obj: Any) -> str:
+    """Serialize *obj* to compact JSON (no whitespace).
+
+    Non-finite floats are written as ``NaN``/``Infinity`` like the standard
+    library does; orjson would silently turn them into ``null``.
+    """
+    if orjson is not None:
+        try:
+            data = orjson.dumps(obj)
+        except TypeError:
+            pass  # a type orjson doesn't handle; let the stdlib try
+        else:
+            # A null may stand for a NaN/inf; let the stdlib redo those
+            if b"null" not in data:
+                return data.decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=True)
+
+
+def loads(text: str | bytes) -> Any:
+    """Deserialize a JSON document.
+
+    Accepts the ``NaN``/``Infinity`` literals written by the standard
+    library, which orjson rejects.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
@@ -8,6 +8,7 @@ cosmetic differences (whitespace, comment style, quote style, dict ordering).
 
 from __future__ import annotations
 
+import functools
 import hashlib
 import json
 
@@ -22,17 +23,31 @@ def canonical_json(obj: dict) -> str:
     return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
 
 
+@functools.lru_cache(maxsize=256)
 def make_program_hash(program_source_code: str) -> str:
     """Compute a SHA-256 hex hash from the normalized program source code.
 
     The source is normalized (comments, includes, whitespace removed) before
     hashing so that cosmetically different versions of the same program
-    produce the same hash.
+    produce the same hash.  Results are memoized by source text, since
+    callers typically pass the same program on every call of a search.
     """
     normalized = normalize_program(program_source_code)
     return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
+@functools.lru_cache(maxsize=256)
+def _key_prefix_hasher(program_hash: str) -> hashlib._Hash:
+    """Return a SHA-256 state primed with the key prefix of *program_hash*.
+
+    Keys sort before values in :func:`canonical_json`, so the canonical form
+    of a record input always starts with the same bytes for a given
+    program.  Callers must ``copy()`` the returned state before updating it.
+    """
+    prefix = canonical_json({"program_hash": program_hash})[:-1]
+    return hashlib.sha256(f'{prefix},"tiralib_schedule_string":'.encode("utf-8"))
+
+
 def make_key(
     program_hash: str,
     tiralib_schedule_string: str,
@@ -41,11 +56,11 @@ def make_key(
 
     The schedule string is normalized before hashing so that equivalent
     schedules (differing only in whitespace or quote style) produce the
-    same key.
+    same key.  The key is the hash of the canonical JSON of
+    ``{"program_hash": ..., "tiralib_schedule_string": ...}``; the part of it
+    that only depends on the program is hashed once per program.
     """
-    input_obj = {
-        "program_hash": program_hash,
-        "tiralib_schedule_string": normalize_schedule(tiralib_schedule_string),
-    }
-    blob = canonical_json(input_obj).encode("utf-8")
-    return hashlib.sha256(blob).hexdigest()
+    hasher = _key_prefix_hasher(program_hash).copy()
+    schedule = json.dumps(normalize_schedule(tiralib_schedule_string), ensure_ascii=True)
+    hasher.update(f"{schedule}}}".encode("utf-8"))
+    return hasher.hexdigest()
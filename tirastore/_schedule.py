@@ -14,9 +14,49 @@ versions of the same program produce the same hash.
 
 from __future__ import annotations
 
+import functools
 import re
 
+# Schedule strings repeat heavily within a search (lookup, then record, of the
+# same candidate), so normalization and validation results are memoized.
+_SCHEDULE_CACHE_SIZE = 65536
+
+# Quoted comp name (single or double quotes)
+_Q = r"""(?:'[^']*'|"[^"]*")"""
+# Unquoted comp name
+_UQ = r"[A-Za-z_]\w*"
+# Any comp name token
+_CN = rf"(?:{_Q}|{_UQ})"
+# comps=[...] block with at least one entry
+_COMPS = rf"comps=\[{_CN}(?:,{_CN})*\]"
+_INT = r"\d+"  # positive integer
+_SINT = r"-?\d+" # positive or negative integer
+_LX = r"L\d+"  # loop level token
+
+# Per-transformation patterns
+_TRANSFORMATIONS = {
+    name: re.compile(pattern)
+    for name, pattern in {
+        "S": rf"^S\({_LX},{_LX},{_SINT},{_SINT},{_COMPS}\)$",
+        "I": rf"^I\({_LX},{_LX},{_COMPS}\)$",
+        "R": rf"^R\({_LX},{_COMPS}\)$",
+        "P": rf"^P\({_LX},{_COMPS}\)$",
+        "T2": rf"^T2\({_LX},{_LX},{_INT},{_INT},{_COMPS}\)$",
+        "T3": rf"^T3\({_LX},{_LX},{_LX},{_INT},{_INT},{_INT},{_COMPS}\)$",
+        "U": rf"^U\({_LX},{_INT},{_COMPS}\)$",
+        "F": rf"^F\({_LX},{_COMPS}\)$",
+    }.items()
+}
+
+# Program normalization patterns (see normalize_program)
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", flags=re.DOTALL)
+_LINE_COMMENT = re.compile(r"//[^\n]*")
+_INCLUDE_LINE = re.compile(
+    r'^\s*#\s*include\s*[<"][^>"]*[>"]\s*$', flags=re.MULTILINE
+)
+
 
+@functools.lru_cache(maxsize=_SCHEDULE_CACHE_SIZE)
 def normalize_schedule(schedule: str) -> str:
     """Normalize a schedule string.
 
@@ -46,6 +86,7 @@ def normalize_schedule(schedule: str) -> str:
     return s
 
 
+@functools.lru_cache(maxsize=_SCHEDULE_CACHE_SIZE)
 def validate_schedule(schedule: str) -> tuple[bool, str]:
     """Validate a schedule string format.
 
@@ -58,31 +99,6 @@ def validate_schedule(schedule: str) -> tuple[bool, str]:
     # Work on a whitespace-free copy
     s = re.sub(r"\s+", "", schedule)
 
-    # Quoted comp name (single or double quotes)
-    _Q = r"""(?:'[^']*'|"[^"]*")"""
-    # Unquoted comp name
-    _UQ = r"[A-Za-z_]\w*"
-    # Any comp name token
-    _CN = rf"(?:{_Q}|{_UQ})"
-    # comps=[...] block with at least one entry
-    _COMPS = rf"comps=\[{_CN}(?:,{_CN})*\]"
-    _INT = r"\d+"  # positive integer
-    _SINT = r"-?\d+" # positive or negative integer
-    _LX = r"L\d+"  # loop level token
-
-    # Per-transformation patterns
-    patterns = {
-        "S": rf"^S\({_LX},{_LX},{_SINT},{_SINT},{_COMPS}\)$",
-        "I": rf"^I\({_LX},{_LX},{_COMPS}\)$",
-        "R": rf"^R\({_LX},{_COMPS}\)$",
-        "P": rf"^P\({_LX},{_COMPS}\)$",
-        "T2": rf"^T2\({_LX},{_LX},{_INT},{_INT},{_COMPS}\)$",
-        "T3": rf"^T3\({_LX},{_LX},{_LX},{_INT},{_INT},{_INT},{_COMPS}\)$",
-        "U": rf"^U\({_LX},{_INT},{_COMPS}\)$",
-        "F": rf"^F\({_LX},{_COMPS}\)$",
-    }
-    compiled = {k: re.compile(v) for k, v in patterns.items()}
-
     for token in s.split("|"):
         if not token:
             return False, "Empty segment in schedule (leading, trailing, or double '|')."
@@ -92,7 +108,7 @@ def validate_schedule(schedule: str) -> tuple[bool, str]:
             return False, f"Unrecognized token (does not start with a transformation name): {token!r}"
 
         tname = name.group(1)
-        rule = compiled.get(tname)
+        rule = _TRANSFORMATIONS.get(tname)
         if rule is None:
             return False, f"Unknown transformation: {tname!r} in {token!r}"
 
@@ -119,13 +135,13 @@ def normalize_program(source: str) -> str:
     if not source:
         return ""
     # 1. Remove block comments (non-greedy, handles multiline)
-    text = re.sub(r"/\*.*?\*/", "", source, flags=re.DOTALL)
+    text = _BLOCK_COMMENT.sub("", source)
     # 2. Remove single-line comments
-    text = re.sub(r"//[^\n]*", "", text)
+    text = _LINE_COMMENT.sub("", text)
     # 3. Remove #include lines
-    text = re.sub(
-        r'^\s*#\s*include\s*[<"][^>"]*[>"]\s*$', "", text, flags=re.MULTILINE
-    )
-    # 4. Remove all whitespace characters
-    text = re.sub(r"\s+", "", text)
+    text = _INCLUDE_LINE.sub("", text)
+    # 4. Remove all whitespace characters.  str.split() drops the same
+    # characters as the regex ``\s`` and is several times faster on large
+    # sources, where this step dominated the cost of make_program_hash.
+    text = "".join(text.split())
     return text
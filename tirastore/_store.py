@@ -7,18 +7,77 @@ they do **not** perform any locking themselves.
 Critical SQLite settings for Lustre compatibility:
 - journal_mode = DELETE  (WAL uses shared memory / mmap which breaks on Lustre)
 - busy_timeout = 0       (we rely on our own lock, not SQLite's)
+
+These are used unless the database is created on a known local filesystem
+(ext4, xfs, ... as read from ``/proc/mounts``), where WAL is safe and the
+store uses ``journal_mode = WAL`` with ``synchronous = NORMAL`` instead.  The
+mode chosen at creation is recorded in ``db_meta`` and followed by every later
+client, so all connections to one database agree on it.
 """
 
 from __future__ import annotations
 
+import contextlib
 import json
 import os
+import re
+import shutil
 import sqlite3
+import threading
+import time
+import zlib
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
+
+from tirastore._cache import LRUCache
+
+_SCHEMA_VERSION = 3
+
+# Local filesystems, where SQLite's POSIX locks and WAL shared memory can be
+# trusted.  Anything else (Lustre, NFS, GPFS, FUSE mounts, filesystems not
+# listed here, ...) gets the Lustre-safe settings.
+_LOCAL_FS_TYPES = frozenset({
+    "ext2", "ext3", "ext4", "xfs", "btrfs", "zfs", "f2fs", "tmpfs", "apfs",
+})
+
+_JOURNAL_MODES = ("DELETE", "WAL")
+
+# Per-connection page cache (negative = KiB) and memory-map window.
+_CACHE_SIZE_KIB = -65536  # 64 MiB
+_MMAP_SIZE = 256 * 1024 * 1024
+
+# Pages in the WAL before a commit checkpoints it back into the database,
+# which bounds the -wal file's size.
+_WAL_AUTOCHECKPOINT = 1000
+
+# A checkpoint can only reuse the WAL from its start, never shrink it, so a
+# WAL inflated by a burst of writes under long-lived readers is truncated back
+# to this size once checkpointed (and checkpointed on open if larger).
+_WAL_SIZE_LIMIT = 64 * 1024 * 1024
+
+# Under WAL, writers serialize on SQLite's own lock (BEGIN IMMEDIATE) rather
+# than the hard-link lock; a writer waits this long for it before giving up.
+_WAL_BUSY_TIMEOUT_MS = 60_000
+
+# With compress_source=True, program sources at least this long are stored
+# zlib-compressed.  Compressed sources are BLOBs and plain ones TEXT in the
+# same column, so each row's storage class says how to read it back.
+_COMPRESS_MIN_BYTES = 1024
 
-_SCHEMA_VERSION = 2
+# Compiled statements kept per connection by the sqlite3 module.  Every query
+# uses ``?`` placeholders so its text, and therefore its cache entry, is
+# fixed; with per-thread WAL connections the cache lives across calls.
+# Statements are compiled on first use, not warmed up when connecting: that
+# would only move the same one-off cost and compile statements a thread may
+# never run.  DELETE connections last one operation, so warming them up
+# could not pay off either.
+_CACHED_STATEMENTS = 256
+
+_CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+# Entries kept in each in-process existence cache.
+_EXISTS_CACHE_SIZE = 4096
 
 _CREATE_META_TABLE = """\
 CREATE TABLE IF NOT EXISTS db_meta (
@@ -43,17 +102,212 @@ CREATE TABLE IF NOT EXISTS records (
     result_json        TEXT NOT NULL,
     hostname           TEXT NOT NULL,
     username           TEXT NOT NULL,
-    creation_date      TEXT NOT NULL,
-    update_date        TEXT NOT NULL,
+    creation_date      INTEGER NOT NULL,
+    update_date        INTEGER NOT NULL,
     source_project     TEXT NOT NULL DEFAULT ''
 );
 """
 
+# Records joined with their program — the shape returned by get() and
+# get_records_by_program_hash().
+_CREATE_RECORDS_FULL_VIEW = """\
+CREATE VIEW IF NOT EXISTS records_full AS
+SELECT r.*, p.program_name, p.source_code
+  FROM records r
+  JOIN programs p ON r.program_hash = p.program_hash;
+"""
+
+# Let stats() answer its DISTINCT queries from the index alone.
+_CREATE_PROJECT_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_records_project ON records(source_project);"
+)
+_CREATE_USER_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_records_user ON records(username);"
+)
+
+# result_json as seen by SQLite's JSON functions: NULL for documents they
+# can't parse, which includes the NaN/Infinity literals the json module
+# writes for non-finite execution times (SQLite < 3.42).  Those rows are
+# decoded in Python instead.
+_VALID_RESULT = "CASE WHEN json_valid(result_json) THEN result_json END"
+_LEGAL_EXPR = f"json_extract({_VALID_RESULT}, '$.is_legal')"
+
+# Per-program record reads (get_program_records, export) seek straight to a
+# program's records, already in creation order.
+_CREATE_PROGRAM_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_records_program "
+    "ON records(program_hash, creation_date);"
+)
+
+_SCHEMA = (
+    _CREATE_META_TABLE,
+    _CREATE_PROGRAMS_TABLE,
+    _CREATE_RECORDS_TABLE,
+    _CREATE_RECORDS_FULL_VIEW,
+    _CREATE_PROJECT_INDEX,
+    _CREATE_USER_INDEX,
+    _CREATE_PROGRAM_INDEX,
+)
+
+# v2 -> v3: creation_date / update_date go from ISO 8601 text to integer
+# unix milliseconds.  SQLite cannot change a column's type in place, so the
+# records table is rebuilt (the view is dropped first, since renaming the
+# table would otherwise retarget it at the old copy).
+_MIGRATE_V2_TO_V3 = (
+    "DROP VIEW IF EXISTS records_full",
+    "ALTER TABLE records RENAME TO records_v2",
+    _CREATE_RECORDS_TABLE,
+    """\
+    INSERT INTO records
+        (key, program_hash, schedule, result_json, hostname,
+         username, creation_date, update_date, source_project)
+    SELECT key, program_hash, schedule, result_json, hostname, username,
+           CAST(ROUND((julianday(creation_date) - 2440587.5) * 86400000) AS INTEGER),
+           CAST(ROUND((julianday(update_date) - 2440587.5) * 86400000) AS INTEGER),
+           source_project
+      FROM records_v2
+    """,
+    "DROP TABLE records_v2",
+)
+
+_INSERT_PROGRAM = """\
+INSERT INTO programs (program_hash, program_name, source_code)
+VALUES (?, ?, ?)
+ON CONFLICT(program_hash) DO NOTHING
+"""
+
+# put_many() stages its rows in this per-connection temp table (kept in
+# memory by temp_store=MEMORY) and moves them into records with a single
+# INSERT ... SELECT.
+_CREATE_STAGING_TABLE = """\
+CREATE TEMP TABLE IF NOT EXISTS records_staging (
+    key, program_hash, schedule, result_json, hostname,
+    username, creation_date, update_date, source_project
+);
+"""
+
+_STAGE_RECORD = "INSERT INTO records_staging VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+_INSERT_FROM_STAGING = """\
+INSERT INTO records
+    (key, program_hash, schedule, result_json, hostname,
+     username, creation_date, update_date, source_project)
+SELECT key, program_hash, schedule, result_json, hostname,
+       username, creation_date, update_date, source_project
+  FROM records_staging
+ WHERE true
+ ORDER BY rowid
+"""
+
+# Conflict clauses for record inserts: keep the existing row, or overwrite
+# everything but its ``creation_date``.
+_ON_CONFLICT_KEEP = "ON CONFLICT(key) DO NOTHING"
+
+_ON_CONFLICT_OVERWRITE = """\
+ON CONFLICT(key) DO UPDATE SET
+    program_hash   = excluded.program_hash,
+    schedule       = excluded.schedule,
+    result_json    = excluded.result_json,
+    hostname       = excluded.hostname,
+    username       = excluded.username,
+    update_date    = excluded.update_date,
+    source_project = excluded.source_project
+"""
+
+_INSERT_RECORD_VALUES = """\
+INSERT INTO records
+    (key, program_hash, schedule, result_json, hostname,
+     username, creation_date, update_date, source_project)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_INSERT_RECORD = _INSERT_RECORD_VALUES + _ON_CONFLICT_KEEP
+_UPSERT_RECORD = _INSERT_RECORD_VALUES + _ON_CONFLICT_OVERWRITE
+
+# Record columns needed to build a LookupResult (no program join).
+_RESULT_COLUMNS = (
+    "key, schedule, result_json, hostname, username, "
+    "creation_date, update_date, source_project"
+)
+
+# Bound parameters per ``IN (...)`` query; stays under SQLite's historical
+# SQLITE_MAX_VARIABLE_NUMBER default of 999.
+_MAX_IN_PARAMS = 900
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _detect_fstype(path: str | Path, mounts: str = "/proc/mounts") -> Optional[str]:
+    """Return the type of the filesystem holding *path*, or None if unknown.
+
+    Picks the longest mount point in *mounts* that is a prefix of *path*.
+    """
+    try:
+        with open(mounts, encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    target = os.path.abspath(str(path))
+    best_mount = ""
+    best_type: Optional[str] = None
+    for line in lines:
+        parts = line.split()
+        if len(parts) < 3:
+            continue
+        # Mount points escape spaces etc. as octal (e.g. "\040")
+        mount = re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), parts[1])
+        if target != mount and not target.startswith(mount.rstrip("/") + "/"):
+            continue
+        if len(mount) >= len(best_mount):
+            best_mount, best_type = mount, parts[2]
+    return best_type
+
+
+def _in_chunks(keys: list[str]) -> Iterator[tuple[str, list[str]]]:
+    """Split *keys* into ``(placeholders, params)`` for ``IN (...)`` queries.
+
+    Each chunk is padded to a power of two by repeating a key (harmless in
+    ``IN``), so only a handful of distinct statements reach the cache.
+    """
+    for i in range(0, len(keys), _MAX_IN_PARAMS):
+        chunk = keys[i:i + _MAX_IN_PARAMS]
+        size = min(1 << (len(chunk) - 1).bit_length(), _MAX_IN_PARAMS)
+        chunk += chunk[-1:] * (size - len(chunk))
+        yield ",".join("?" * len(chunk)), chunk
+
+
+def _decode_source(value: str | bytes) -> str:
+    """Return a stored ``source_code`` value as text (see _encode_source)."""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+def _time_stats(
+    result_json: str,
+) -> tuple[bool, Optional[float], Optional[float]]:
+    """Compute get_time_stats()'s tuple in Python, for rows SQLite can't parse."""
+    result = json.loads(result_json)
+    times = result.get("execution_times") or []
+    if not times:
+        return bool(result["is_legal"]), None, None
+    return bool(result["is_legal"]), min(times), sum(times) / len(times)
+
+
+def _program_dict(row: sqlite3.Row) -> dict[str, Any]:
+    """Convert a row holding a ``source_code`` column to a dict, decoded."""
+    d = dict(row)
+    d["source_code"] = _decode_source(d["source_code"])
+    return d
+
+
+def _now_ms() -> int:
+    """Current time as integer unix milliseconds (the record date format)."""
+    return time.time_ns() // 1_000_000
+
+
 class Store:
     """Thin wrapper around an on-disk SQLite database.
 
@@ -61,24 +315,178 @@ class Store:
     ----------
     db_path : str or Path
         Path to the SQLite file.
+    journal_mode : str or None
+        ``"DELETE"`` or ``"WAL"`` for a new database.  If *None* (default),
+        WAL is used when the database's directory is on a local filesystem
+        and DELETE otherwise.  An existing database keeps the mode recorded
+        when it was created (see :meth:`load_journal_mode`).
+    compress_source : bool
+        If *True*, newly stored program sources of 1 KiB or more are
+        zlib-compressed.  Reading handles both forms regardless.
     """
 
-    def __init__(self, db_path: str | Path) -> None:
+    def __init__(
+        self,
+        db_path: str | Path,
+        journal_mode: Optional[str] = None,
+        compress_source: bool = False,
+    ) -> None:
         self.db_path = Path(db_path)
+        self.compress_source = compress_source
+        if journal_mode is None:
+            fstype = _detect_fstype(self.db_path.parent)
+            journal_mode = "WAL" if fstype in _LOCAL_FS_TYPES else "DELETE"
+            self._mode_requested = False
+        else:
+            self._mode_requested = True
+        journal_mode = journal_mode.upper()
+        if journal_mode not in _JOURNAL_MODES:
+            raise ValueError(
+                f"journal_mode must be one of {_JOURNAL_MODES}, got {journal_mode!r}"
+            )
+        self.journal_mode = journal_mode
+
+        # Existence caches (see contains() / put_program()).  Programs are
+        # never deleted, so a cached program hash can never go stale; a
+        # cached key can, so writes never skip the database because of it.
+        self._known_programs = LRUCache(_EXISTS_CACHE_SIZE)
+        self._known_keys = LRUCache(_EXISTS_CACHE_SIZE)
+
+        # Per-thread connections kept open under WAL (see _connection()),
+        # plus a registry of all of them so close() can reach every thread's.
+        self._local = threading.local()
+        self._open_conns: list[
+            tuple[int, threading.Thread, sqlite3.Connection]
+        ] = []
+        self._open_conns_mutex = threading.Lock()
 
     # ------------------------------------------------------------------
-    # Connection helpers (short-lived, opened inside the lock)
+    # Connection helpers
     # ------------------------------------------------------------------
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(str(self.db_path), timeout=5)
-        conn.execute("PRAGMA journal_mode=DELETE;")
-        conn.execute("PRAGMA busy_timeout=0;")
-        conn.execute("PRAGMA synchronous=FULL;")
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=5,
+            check_same_thread=False,
+            cached_statements=_CACHED_STATEMENTS,
+        )
+        if self.journal_mode == "WAL":
+            mode = conn.execute("PRAGMA journal_mode=WAL;").fetchone()[0]
+            if mode.lower() != "wal":
+                # SQLite keeps the old mode if it can't switch (e.g. no
+                # shared-memory support); use the Lustre-safe settings then.
+                print(
+                    f"[TiraStore] WAL journal mode unavailable for {self.db_path} "
+                    f"(got {mode!r}) — falling back to DELETE."
+                )
+                self.journal_mode = "DELETE"
+        if self.journal_mode == "WAL":
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute(f"PRAGMA busy_timeout={_WAL_BUSY_TIMEOUT_MS};")
+            conn.execute(f"PRAGMA wal_autocheckpoint={_WAL_AUTOCHECKPOINT};")
+            conn.execute(f"PRAGMA journal_size_limit={_WAL_SIZE_LIMIT};")
+            # Reads go through the kernel page cache of a long-lived
+            # connection.  Not used under DELETE: those connections live for
+            # one operation, and mmap on a shared filesystem depends on its
+            # cross-node cache coherence.
+            conn.execute(f"PRAGMA mmap_size={_MMAP_SIZE};")
+        else:
+            conn.execute("PRAGMA journal_mode=DELETE;")
+            conn.execute("PRAGMA busy_timeout=0;")
+            conn.execute("PRAGMA synchronous=FULL;")
         conn.execute("PRAGMA foreign_keys=ON;")
+        # Keep sorts/temp tables off disk and serve reads from a larger page
+        # cache.
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute(f"PRAGMA cache_size={_CACHE_SIZE_KIB};")
         conn.row_factory = sqlite3.Row
         return conn
 
+    @contextlib.contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Provide a connection for one operation.
+
+        Under DELETE (shared filesystems) a fresh connection is opened and
+        closed around every operation, inside the caller's hard-link lock.
+        Under WAL each thread reuses its own long-lived connection, which
+        saves the open and PRAGMA setup per call and keeps the page cache
+        warm; WAL snapshots keep reads consistent across other writers.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            yield conn
+            return
+        conn = self._connect()
+        if self.journal_mode == "WAL":
+            # Connections inherited across fork() are never reused
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._register(conn)
+            yield conn
+            return
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _register(self, conn: sqlite3.Connection) -> None:
+        """Track a new per-thread connection, closing those of dead threads.
+
+        Threads that exit leave their connection behind in the registry, so
+        pools that keep replacing worker threads would otherwise pile up
+        open connections until close().
+        """
+        pid = os.getpid()
+        with self._open_conns_mutex:
+            dead = [
+                entry for entry in self._open_conns
+                if entry[0] == pid and not entry[1].is_alive()
+            ]
+            if dead:
+                self._open_conns = [e for e in self._open_conns if e not in dead]
+            self._open_conns.append((pid, threading.current_thread(), conn))
+        for _, _, stale in dead:
+            stale.close()
+
+    def _encode_source(self, source_code: str) -> str | bytes:
+        """Return *source_code* as it should be stored (see _decode_source)."""
+        if not self.compress_source:
+            return source_code
+        data = source_code.encode("utf-8")
+        if len(data) < _COMPRESS_MIN_BYTES:
+            return source_code
+        packed = zlib.compress(data, 6)
+        return packed if len(packed) < len(data) else source_code
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction, started with ``BEGIN IMMEDIATE``.
+
+        The write lock is taken up front, so concurrent writers queue on the
+        busy timeout instead of failing halfway through.  Commits on success
+        and rolls back if the block raises.
+        """
+        with self._connection() as conn:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+
+    def close(self) -> None:
+        """Close the connections kept open by this process's threads.
+
+        Must not be called while another thread is using the store.  The
+        store remains usable afterwards; threads reconnect on next use.
+        """
+        with self._open_conns_mutex:
+            conns, self._open_conns = self._open_conns, []
+            self._local = threading.local()
+        pid = os.getpid()
+        for owner, _, conn in conns:
+            # A forked child must leave its parent's connections alone
+            if owner == pid:
+                conn.close()
+
     # ------------------------------------------------------------------
     # Schema / init
     # ------------------------------------------------------------------
@@ -92,26 +500,21 @@ class Store:
         try:
             conn = self._connect()
             try:
-                conn.execute(_CREATE_META_TABLE)
-                conn.execute(_CREATE_PROGRAMS_TABLE)
-                conn.execute(_CREATE_RECORDS_TABLE)
-                conn.execute(
-                    "INSERT OR IGNORE INTO db_meta (key, value) VALUES (?, ?)",
-                    ("schema_version", str(_SCHEMA_VERSION)),
-                )
-                conn.execute(
-                    "INSERT OR IGNORE INTO db_meta (key, value) VALUES (?, ?)",
-                    ("cpu_model", cpu_model),
-                )
-                conn.execute(
-                    "INSERT OR IGNORE INTO db_meta (key, value) VALUES (?, ?)",
-                    ("slurm_cpus", slurm_cpus),
-                )
-                conn.execute(
-                    "INSERT OR IGNORE INTO db_meta (key, value) VALUES (?, ?)",
-                    ("created_at", _now_iso()),
-                )
-                conn.commit()
+                with conn:
+                    for stmt in _SCHEMA:
+                        conn.execute(stmt)
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO db_meta (key, value) VALUES (?, ?)",
+                        [
+                            ("schema_version", str(_SCHEMA_VERSION)),
+                            ("cpu_model", cpu_model),
+                            ("slurm_cpus", slurm_cpus),
+                            ("created_at", _now_iso()),
+                            # After _connect(), which may have fallen back
+                            # from WAL to DELETE.
+                            ("journal_mode", self.journal_mode),
+                        ],
+                    )
             finally:
                 conn.close()
         finally:
@@ -124,40 +527,93 @@ class Store:
             pass
 
     def ensure_tables(self) -> None:
-        """Idempotent: create tables if they don't exist (for safety)."""
+        """Idempotent: create tables and views if they don't exist.
+
+        Also brings databases created by older versions up to date: any
+        schema objects added since are created, and the records table is
+        migrated to the current schema version.  The journal mode recorded
+        in the database is adopted first (see :meth:`load_journal_mode`).
+        """
+        self.load_journal_mode()
         conn = self._connect()
         try:
-            conn.execute(_CREATE_META_TABLE)
-            conn.execute(_CREATE_PROGRAMS_TABLE)
-            conn.execute(_CREATE_RECORDS_TABLE)
-            conn.commit()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(_CREATE_META_TABLE)
+                row = conn.execute(
+                    "SELECT value FROM db_meta WHERE key = 'schema_version'"
+                ).fetchone()
+                if row is not None and int(row["value"]) < 3:
+                    for stmt in _MIGRATE_V2_TO_V3:
+                        conn.execute(stmt)
+                    conn.execute(
+                        "UPDATE db_meta SET value = ? WHERE key = 'schema_version'",
+                        (str(_SCHEMA_VERSION),),
+                    )
+                for stmt in _SCHEMA:
+                    conn.execute(stmt)
+        finally:
+            conn.close()
+
+    def load_journal_mode(self) -> None:
+        """Switch to the journal mode recorded when the database was created.
+
+        Read over a connection that sets no journal mode, so that it does not
+        convert the file.  Databases that predate the record use DELETE,
+        which the clients that created them always forced.
+        """
+        mode = self.read_raw_meta("journal_mode")
+        if mode not in _JOURNAL_MODES:
+            mode = "DELETE"
+        if self._mode_requested and mode != self.journal_mode:
+            print(
+                f"[TiraStore] {self.db_path} was created with journal mode {mode}; "
+                f"ignoring journal_mode={self.journal_mode!r}."
+            )
+        self.journal_mode = mode
+
+    def read_raw_meta(self, key: str) -> Optional[str]:
+        """Read one ``db_meta`` value without setting a journal mode.
+
+        Unlike :meth:`get_meta` this opens its own plain connection, so it
+        is safe before the database's journal mode is known.  Returns
+        *None* if the key, the table or the file itself is missing (the
+        file is not created).
+        """
+        try:
+            conn = sqlite3.connect(
+                f"{self.db_path.absolute().as_uri()}?mode=rw", timeout=5, uri=True
+            )
+        except sqlite3.OperationalError:  # no such file
+            return None
+        try:
+            row = conn.execute(
+                "SELECT value FROM db_meta WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.OperationalError:  # no db_meta table yet
+            row = None
         finally:
             conn.close()
+        return row[0] if row is not None else None
 
     # ------------------------------------------------------------------
     # DB-level metadata
     # ------------------------------------------------------------------
 
     def get_meta(self, key: str) -> Optional[str]:
-        conn = self._connect()
-        try:
+        with self._connection() as conn:
             row = conn.execute(
                 "SELECT value FROM db_meta WHERE key = ?", (key,)
             ).fetchone()
             return row["value"] if row else None
-        finally:
-            conn.close()
 
     def set_meta(self, key: str, value: str) -> None:
-        conn = self._connect()
-        try:
-            conn.execute(
-                "INSERT OR REPLACE INTO db_meta (key, value) VALUES (?, ?)",
-                (key, value),
-            )
-            conn.commit()
-        finally:
-            conn.close()
+        with self._connection() as conn:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO db_meta (key, value) VALUES (?, ?)",
+                    (key, value),
+                )
 
     def get_cpu_model(self) -> Optional[str]:
         return self.get_meta("cpu_model")
@@ -165,6 +621,18 @@ class Store:
     def get_slurm_cpus(self) -> Optional[str]:
         return self.get_meta("slurm_cpus")
 
+    def get_cpu_metadata(self) -> tuple[Optional[str], Optional[str]]:
+        """Return ``(cpu_model, slurm_cpus)`` from the metadata in one query."""
+        with self._connection() as conn:
+            return self._cpu_metadata(conn)
+
+    @staticmethod
+    def _cpu_metadata(conn: sqlite3.Connection) -> tuple[Optional[str], Optional[str]]:
+        meta = dict(conn.execute(
+            "SELECT key, value FROM db_meta WHERE key IN ('cpu_model', 'slurm_cpus')"
+        ).fetchall())
+        return meta.get("cpu_model"), meta.get("slurm_cpus")
+
     # ------------------------------------------------------------------
     # Programs CRUD
     # ------------------------------------------------------------------
@@ -173,85 +641,76 @@ class Store:
         self, program_hash: str, program_name: str, source_code: str
     ) -> bool:
         """Insert a program if it does not already exist.  Returns True if inserted."""
-        conn = self._connect()
-        try:
+        if program_hash in self._known_programs:
+            return False
+        with self._connection() as conn:
             existing = conn.execute(
                 "SELECT 1 FROM programs WHERE program_hash = ?", (program_hash,)
             ).fetchone()
-            if existing:
-                return False
-            conn.execute(
-                "INSERT INTO programs (program_hash, program_name, source_code) VALUES (?, ?, ?)",
-                (program_hash, program_name, source_code),
-            )
-            conn.commit()
-            return True
-        finally:
-            conn.close()
+            if not existing:
+                with conn:
+                    conn.execute(
+                        _INSERT_PROGRAM,
+                        (program_hash, program_name, self._encode_source(source_code)),
+                    )
+            self._known_programs.put(program_hash, True)
+            return not existing
 
     def get_program(self, program_hash: str) -> Optional[dict[str, Any]]:
         """Return a program row as a dict, or None."""
-        conn = self._connect()
-        try:
+        with self._connection() as conn:
             row = conn.execute(
                 "SELECT * FROM programs WHERE program_hash = ?", (program_hash,)
             ).fetchone()
-            return dict(row) if row else None
-        finally:
-            conn.close()
+            if row is None:
+                return None
+            self._known_programs.put(program_hash, True)
+            return _program_dict(row)
 
     def get_programs_by_name(self, program_name: str) -> list[dict[str, Any]]:
         """Return all program rows matching a given name."""
-        conn = self._connect()
-        try:
+        with self._connection() as conn:
             rows = conn.execute(
                 "SELECT * FROM programs WHERE program_name = ? ORDER BY program_hash",
                 (program_name,),
             ).fetchall()
-            return [dict(r) for r in rows]
-        finally:
-            conn.close()
+            return [_program_dict(r) for r in rows]
 
     def program_count(self) -> int:
-        conn = self._connect()
-        try:
+        with self._connection() as conn:
             row = conn.execute("SELECT COUNT(*) AS cnt FROM programs").fetchone()
             return row["cnt"]
-        finally:
-            conn.close()
 
     # ------------------------------------------------------------------
     # Record CRUD
     # ------------------------------------------------------------------
 
     def contains(self, key: str) -> bool:
-        conn = self._connect()
-        try:
+        """Return True if a record with *key* exists.
+
+        Positive answers are cached.  A record deleted by *another* process
+        may therefore still be reported present until it is evicted.
+        """
+        if key in self._known_keys:
+            return True
+        with self._connection() as conn:
             row = conn.execute(
                 "SELECT 1 FROM records WHERE key = ?", (key,)
             ).fetchone()
-            return row is not None
-        finally:
-            conn.close()
+        if row is None:
+            return False
+        self._known_keys.put(key, True)
+        return True
 
     def get(self, key: str) -> Optional[dict[str, Any]]:
         """Return a record joined with its program, or None."""
-        conn = self._connect()
-        try:
+        with self._connection() as conn:
             row = conn.execute(
-                """\
-                SELECT r.*, p.program_name, p.source_code
-                  FROM records r
-                  JOIN programs p ON r.program_hash = p.program_hash
-                 WHERE r.key = ?
-                """,
-                (key,),
+                "SELECT * FROM records_full WHERE key = ?", (key,)
             ).fetchone()
             if row is None:
                 return None
-            return dict(row)
-        finally:
-            conn.close()
+            return _program_dict(row)
 
     def put(
         self,
@@ -267,45 +726,18 @@ class Store:
         """Insert or update a record.  Returns True if a write occurred.
 
         The referenced program must already exist in the programs table.
+        The insert always reaches the database, even for a key cached as
+        existing, so a record deleted by another process can be re-written.
         """
-        now = _now_iso()
-        conn = self._connect()
-        try:
-            existing = conn.execute(
-                "SELECT 1 FROM records WHERE key = ?", (key,)
-            ).fetchone()
-            if existing and not overwrite:
-                return False
-            if existing and overwrite:
-                conn.execute(
-                    """\
-                    UPDATE records
-                       SET program_hash   = ?,
-                           schedule       = ?,
-                           result_json    = ?,
-                           hostname       = ?,
-                           username       = ?,
-                           update_date    = ?,
-                           source_project = ?
-                     WHERE key = ?
-                    """,
-                    (program_hash, schedule, result_json, hostname, username, now, source_project, key),
-                )
-            else:
-                conn.execute(
-                    """\
-                    INSERT INTO records
-                        (key, program_hash, schedule, result_json, hostname,
-                         username, creation_date, update_date, source_project)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (key, program_hash, schedule, result_json, hostname,
-                     username, now, now, source_project),
-                )
-            conn.commit()
-            return True
-        finally:
-            conn.close()
+        now = _now_ms()
+        with self.transaction() as conn:
+            written = conn.execute(
+                _UPSERT_RECORD if overwrite else _INSERT_RECORD,
+                (key, program_hash, schedule, result_json, hostname,
+                 username, now, now, source_project),
+            ).rowcount
+        self._known_keys.put(key, True)
+        return written > 0
 
     def put_many(
         self,
@@ -315,6 +747,8 @@ class Store:
         username: str,
         source_project: str,
         overwrite: bool = False,
+        program_name: Optional[str] = None,
+        source_code: Optional[str] = None,
     ) -> int:
         """Insert multiple records in a single transaction.
 
@@ -326,101 +760,305 @@ class Store:
             The program hash shared by all rows.
         overwrite : bool
             If True, overwrite existing records.
+        program_name, source_code : str or None
+            If given, the program is inserted (if absent) in the same
+            transaction, so the whole batch costs a single commit.
 
         Returns the number of rows actually written.
         """
-        now = _now_iso()
-        written = 0
-        conn = self._connect()
-        try:
-            for key, schedule, result_json in rows:
-                existing = conn.execute(
-                    "SELECT 1 FROM records WHERE key = ?", (key,)
-                ).fetchone()
-                if existing and not overwrite:
-                    continue
-                if existing and overwrite:
-                    conn.execute(
-                        """\
-                        UPDATE records
-                           SET program_hash   = ?,
-                               schedule       = ?,
-                               result_json    = ?,
-                               hostname       = ?,
-                               username       = ?,
-                               update_date    = ?,
-                               source_project = ?
-                         WHERE key = ?
-                        """,
-                        (program_hash, schedule, result_json, hostname,
-                         username, now, source_project, key),
-                    )
-                else:
-                    conn.execute(
-                        """\
-                        INSERT INTO records
-                            (key, program_hash, schedule, result_json, hostname,
-                             username, creation_date, update_date, source_project)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (key, program_hash, schedule, result_json, hostname,
-                         username, now, now, source_project),
-                    )
-                written += 1
-            conn.commit()
+        programs = []
+        if source_code is not None:
+            programs.append((program_hash, program_name, source_code))
+        return self.put_records(
+            [(key, program_hash, schedule, result_json)
+             for key, schedule, result_json in rows],
+            hostname=hostname,
+            username=username,
+            source_project=source_project,
+            overwrite=overwrite,
+            programs=programs,
+        )
+
+    def put_records(
+        self,
+        rows: list[tuple[str, str, str, str]],
+        hostname: str,
+        username: str,
+        source_project: str,
+        overwrite: bool = False,
+        programs: Optional[list[tuple[str, str, str]]] = None,
+    ) -> int:
+        """Insert records of any number of programs in a single transaction.
+
+        Parameters
+        ----------
+        rows : list of (key, program_hash, schedule, result_json) tuples
+            The records to write.
+        overwrite : bool
+            If True, overwrite existing records.
+        programs : list of (program_hash, program_name, source_code) or None
+            Programs inserted (if absent) in the same transaction.
+
+        Returns the number of rows actually written.
+        """
+        now = _now_ms()
+        params = [
+            (key, program_hash, schedule, result_json, hostname,
+             username, now, now, source_project)
+            for key, program_hash, schedule, result_json in rows
+        ]
+        new_programs: dict[str, tuple[str, str, Any]] = {}
+        for program_hash, program_name, source_code in programs or ():
+            if (program_hash not in new_programs
+                    and program_hash not in self._known_programs):
+                new_programs[program_hash] = (
+                    program_hash, program_name, self._encode_source(source_code)
+                )
+        conflict = _ON_CONFLICT_OVERWRITE if overwrite else _ON_CONFLICT_KEEP
+        with self._connection() as conn:
+            conn.execute(_CREATE_STAGING_TABLE)
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                if new_programs:
+                    conn.executemany(_INSERT_PROGRAM, new_programs.values())
+                conn.execute("DELETE FROM records_staging")
+                conn.executemany(_STAGE_RECORD, params)
+                # Later duplicates of a key within the batch count as existing
+                written = conn.execute(_INSERT_FROM_STAGING + conflict).rowcount
+                conn.execute("DELETE FROM records_staging")
+            for program_hash, _, _ in programs or ():
+                self._known_programs.put(program_hash, True)
+            for key, _, _, _ in rows:
+                self._known_keys.put(key, True)
             return written
-        finally:
-            conn.close()
+
+    def put_each(
+        self,
+        rows: list[tuple[str, str, str, str, bool]],
+        hostname: str,
+        username: str,
+        source_project: str,
+        programs: Optional[list[tuple[str, str, str]]] = None,
+    ) -> list[bool]:
+        """Write records one by one, but in a single transaction.
+
+        Unlike :meth:`put_records`, each row carries its own overwrite flag
+        and the outcome of every row is reported, as if :meth:`put` had been
+        called for each in turn.
+
+        Parameters
+        ----------
+        rows : list of (key, program_hash, schedule, result_json, overwrite)
+            The records to write.
+        programs : list of (program_hash, program_name, source_code) or None
+            Programs inserted (if absent) in the same transaction.
+
+        Returns a list of booleans, True where a write occurred.
+        """
+        now = _now_ms()
+        new_programs: dict[str, tuple[str, str, Any]] = {}
+        for program_hash, program_name, source_code in programs or ():
+            if (program_hash not in new_programs
+                    and program_hash not in self._known_programs):
+                new_programs[program_hash] = (
+                    program_hash, program_name, self._encode_source(source_code)
+                )
+        written: list[bool] = []
+        with self.transaction() as conn:
+            if new_programs:
+                conn.executemany(_INSERT_PROGRAM, new_programs.values())
+            for key, program_hash, schedule, result_json, overwrite in rows:
+                written.append(conn.execute(
+                    _UPSERT_RECORD if overwrite else _INSERT_RECORD,
+                    (key, program_hash, schedule, result_json, hostname,
+                     username, now, now, source_project),
+                ).rowcount > 0)
+        for program_hash in new_programs:
+            self._known_programs.put(program_hash, True)
+        for key, _, _, _, _ in rows:
+            self._known_keys.put(key, True)
+        return written
+
+    def existing_keys(self, keys: list[str], cached: bool = True) -> set[str]:
+        """Return the subset of *keys* that exist in the records table.
+
+        Keys already known to exist are answered from the in-process cache;
+        only the rest are queried.  Pass ``cached=False`` to query them all,
+        e.g. before skipping writes: a record deleted by another process
+        stays cached as existing.
+        """
+        known = {key for key in keys if cached and key in self._known_keys}
+        unknown = [key for key in keys if key not in known]
+        if not unknown:
+            return known
+        with self._connection() as conn:
+            found = self._select_existing(conn, unknown)
+        for key in found:
+            self._known_keys.put(key, True)
+        return known | found
+
+    @staticmethod
+    def _select_existing(conn: sqlite3.Connection, keys: list[str]) -> set[str]:
+        found: set[str] = set()
+        for placeholders, chunk in _in_chunks(keys):
+            rows = conn.execute(
+                f"SELECT key FROM records WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            found.update(r["key"] for r in rows)
+        return found
+
+    def get_result(self, key: str) -> Optional[sqlite3.Row]:
+        """Return the record columns needed for a lookup result, or None.
+
+        Unlike :meth:`get`, the program is not joined in, so its source code
+        is neither read nor decompressed.
+        """
+        with self._connection() as conn:
+            row = conn.execute(
+                f"SELECT {_RESULT_COLUMNS} FROM records WHERE key = ?", (key,)
+            ).fetchone()
+        if row is not None:
+            self._known_keys.put(key, True)
+        return row
+
+    def get_many(self, keys: list[str]) -> dict[str, sqlite3.Row]:
+        """Return the records stored under *keys*, mapped by key.
+
+        Only the record columns needed to build a lookup result are
+        selected; keys that are not stored are absent from the result.
+        """
+        found: dict[str, sqlite3.Row] = {}
+        if not keys:
+            return found
+        with self._connection() as conn:
+            for placeholders, chunk in _in_chunks(keys):
+                for row in conn.execute(
+                    f"SELECT {_RESULT_COLUMNS} FROM records "
+                    f"WHERE key IN ({placeholders})",
+                    chunk,
+                ):
+                    found[row["key"]] = row
+        for key in found:
+            self._known_keys.put(key, True)
+        return found
+
+    def get_time_stats(
+        self, keys: list[str]
+    ) -> dict[str, tuple[bool, Optional[float], Optional[float]]]:
+        """Return ``(is_legal, min_time, mean_time)`` for each stored key.
+
+        The aggregates are computed by SQLite from the stored JSON, so no
+        per-measurement Python objects are built.  Times are *None* for
+        records without measurements; missing keys are absent.
+        """
+        found: dict[str, tuple[bool, Optional[float], Optional[float]]] = {}
+        if not keys:
+            return found
+        with self._connection() as conn:
+            for placeholders, chunk in _in_chunks(keys):
+                for key, valid, is_legal, min_time, mean_time, raw in conn.execute(
+                    "SELECT r.key, json_valid(r.result_json), "
+                    f"{_LEGAL_EXPR}, MIN(t.value), AVG(t.value), "
+                    "CASE WHEN json_valid(r.result_json) THEN NULL "
+                    "ELSE r.result_json END "
+                    "FROM records AS r LEFT JOIN "
+                    f"json_each({_VALID_RESULT}, '$.execution_times') AS t "
+                    f"WHERE r.key IN ({placeholders}) GROUP BY r.key",
+                    chunk,
+                ):
+                    if not valid:
+                        is_legal, min_time, mean_time = _time_stats(raw)
+                    found[key] = (bool(is_legal), min_time, mean_time)
+        for key in found:
+            self._known_keys.put(key, True)
+        return found
 
     def get_records_by_program_hash(
         self, program_hash: str
     ) -> list[dict[str, Any]]:
         """Return all records (joined with program) for a given program hash."""
-        conn = self._connect()
-        try:
+        with self._connection() as conn:
             rows = conn.execute(
-                """\
-                SELECT r.*, p.program_name, p.source_code
-                  FROM records r
-                  JOIN programs p ON r.program_hash = p.program_hash
-                 WHERE r.program_hash = ?
-                 ORDER BY r.creation_date
-                """,
+                "SELECT * FROM records_full WHERE program_hash = ? ORDER BY creation_date",
                 (program_hash,),
             ).fetchall()
-            return [dict(r) for r in rows]
-        finally:
-            conn.close()
+            return [_program_dict(r) for r in rows]
+
+    def get_program_and_records(
+        self, program_hash: str
+    ) -> Optional[tuple[dict[str, Any], list[sqlite3.Row]]]:
+        """Return a program and its records (oldest first) in one read.
+
+        Both queries run in a single read transaction on one connection, and
+        the program's source code is fetched once rather than joined onto
+        every record.  Returns *None* if the program is not stored.
+        """
+        with self._connection() as conn:
+            with conn:
+                conn.execute("BEGIN")
+                program = conn.execute(
+                    "SELECT * FROM programs WHERE program_hash = ?",
+                    (program_hash,),
+                ).fetchone()
+                if program is None:
+                    return None
+                records = conn.execute(
+                    f"SELECT {_RESULT_COLUMNS} FROM records "
+                    "WHERE program_hash = ? ORDER BY creation_date",
+                    (program_hash,),
+                ).fetchall()
+        self._known_programs.put(program_hash, True)
+        return _program_dict(program), records
+
+    def iter_records_by_program_hash(
+        self, program_hash: str
+    ) -> Iterator[sqlite3.Row]:
+        """Stream the records of a program, oldest first.
+
+        Unlike :meth:`get_records_by_program_hash`, rows are not joined with
+        the program (so its source code isn't repeated on every row) and are
+        yielded as SQLite produces them.
+        """
+        with self._connection() as conn:
+            yield from conn.execute(
+                f"SELECT {_RESULT_COLUMNS} FROM records "
+                "WHERE program_hash = ? ORDER BY creation_date",
+                (program_hash,),
+            )
 
     def delete(self, key: str) -> bool:
         """Delete a record by key.  Returns True if it existed."""
-        conn = self._connect()
-        try:
+        with self.transaction() as conn:
             cur = conn.execute("DELETE FROM records WHERE key = ?", (key,))
-            conn.commit()
-            return cur.rowcount > 0
-        finally:
-            conn.close()
+        self._known_keys.pop(key)
+        return cur.rowcount > 0
 
     def count(self) -> int:
-        conn = self._connect()
-        try:
+        with self._connection() as conn:
             row = conn.execute("SELECT COUNT(*) AS cnt FROM records").fetchone()
             return row["cnt"]
-        finally:
-            conn.close()
 
     def stats(self) -> dict[str, Any]:
         """Return summary statistics about the database."""
-        conn = self._connect()
-        try:
-            total = conn.execute("SELECT COUNT(*) AS cnt FROM records").fetchone()["cnt"]
-            legal = conn.execute(
-                "SELECT COUNT(*) AS cnt FROM records WHERE json_extract(result_json, '$.is_legal') = 1"
-            ).fetchone()["cnt"]
-            illegal = conn.execute(
-                "SELECT COUNT(*) AS cnt FROM records WHERE json_extract(result_json, '$.is_legal') = 0"
-            ).fetchone()["cnt"]
+        with self._connection() as conn:
+            by_legal = {
+                r["is_legal"]: r["cnt"]
+                for r in conn.execute(
+                    f"SELECT {_LEGAL_EXPR} AS is_legal, COUNT(*) AS cnt "
+                    f"FROM records GROUP BY {_LEGAL_EXPR}"
+                )
+            }
+            if by_legal.get(None):
+                # Rows SQLite can't parse (see _VALID_RESULT)
+                for row in conn.execute(
+                    "SELECT result_json FROM records WHERE NOT json_valid(result_json)"
+                ):
+                    is_legal = int(bool(json.loads(row["result_json"])["is_legal"]))
+                    by_legal[is_legal] = by_legal.get(is_legal, 0) + 1
+                    by_legal[None] -= 1
+            total = sum(by_legal.values())
+            legal = by_legal.get(1, 0)
+            illegal = by_legal.get(0, 0)
             programs = conn.execute(
                 "SELECT COUNT(*) AS cnt FROM programs"
             ).fetchone()["cnt"]
@@ -430,6 +1068,7 @@ class Store:
             users = conn.execute(
                 "SELECT DISTINCT username FROM records"
             ).fetchall()
+            cpu_model, slurm_cpus = self._cpu_metadata(conn)
             return {
                 "total_records": total,
                 "legal_records": legal,
@@ -437,11 +1076,9 @@ class Store:
                 "total_programs": programs,
                 "source_projects": [r["source_project"] for r in projects],
                 "users": [r["username"] for r in users],
-                "cpu_model": self.get_cpu_model(),
-                "slurm_cpus": self.get_slurm_cpus(),
+                "cpu_model": cpu_model,
+                "slurm_cpus": slurm_cpus,
             }
-        finally:
-            conn.close()
 
     def get_all_programs_with_records(self) -> list[dict[str, Any]]:
         """Return every program joined with its records.
@@ -450,8 +1087,7 @@ class Store:
         ``program_name``, ``source_code``) plus a ``records`` list of
         dicts containing ``schedule``, ``result_json``.
         """
-        conn = self._connect()
-        try:
+        with self._connection() as conn:
             programs = conn.execute(
                 "SELECT * FROM programs ORDER BY program_name, program_hash"
             ).fetchall()
@@ -462,17 +1098,117 @@ class Store:
                     "WHERE program_hash = ? ORDER BY creation_date",
                     (prog["program_hash"],),
                 ).fetchall()
-                entry = dict(prog)
+                entry = _program_dict(prog)
                 entry["records"] = [dict(r) for r in records]
                 result.append(entry)
             return result
-        finally:
-            conn.close()
+
+    def iter_programs_with_records(
+        self, batch_size: int = 1000
+    ) -> Iterator[tuple[str, str, list[tuple[str, str]]]]:
+        """Stream every program with its records, one program at a time.
+
+        Yields ``(program_name, source_code, records)`` tuples in the same
+        order as :meth:`get_all_programs_with_records`, where ``records`` is
+        a list of ``(schedule, result_json)`` pairs.  Rows are fetched in
+        batches of *batch_size*, so only one program's records are held in
+        memory at a time.
+        """
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "SELECT p.program_hash, p.program_name, p.source_code, "
+                "r.schedule, r.result_json "
+                "FROM programs p LEFT JOIN records r "
+                "ON r.program_hash = p.program_hash "
+                "ORDER BY p.program_name, p.program_hash, r.creation_date"
+            )
+            current: Optional[str] = None
+            name = source = ""
+            records: list[tuple[str, str]] = []
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    if row["program_hash"] != current:
+                        if current is not None:
+                            yield name, source, records
+                        current = row["program_hash"]
+                        name = row["program_name"]
+                        source = _decode_source(row["source_code"])
+                        records = []
+                    if row["schedule"] is not None:
+                        records.append((row["schedule"], row["result_json"]))
+            if current is not None:
+                yield name, source, records
+
+    def wal_size(self) -> int:
+        """Return the size in bytes of the ``-wal`` file (0 if absent)."""
+        try:
+            return os.path.getsize(f"{self.db_path}-wal")
+        except OSError:
+            return 0
+
+    def checkpoint(self, mode: str = "TRUNCATE") -> tuple[int, int, int]:
+        """Checkpoint the WAL into the database file.
+
+        Parameters
+        ----------
+        mode : str
+            SQLite checkpoint mode: ``"PASSIVE"``, ``"FULL"``, ``"RESTART"``
+            or ``"TRUNCATE"`` (default; also empties the ``-wal`` file).
+
+        Returns
+        -------
+        tuple of int
+            ``(busy, wal_frames, checkpointed_frames)`` as reported by
+            ``PRAGMA wal_checkpoint``.  ``busy`` is 1 if readers or a
+            writer kept the checkpoint from completing.  In DELETE mode
+            there is no WAL and ``(0, -1, -1)`` is returned.
+        """
+        mode = mode.upper()
+        if mode not in _CHECKPOINT_MODES:
+            raise ValueError(
+                f"mode must be one of {_CHECKPOINT_MODES}, got {mode!r}"
+            )
+        with self._connection() as conn:
+            return tuple(conn.execute(f"PRAGMA wal_checkpoint({mode});").fetchone())
+
+    def trim_wal(self) -> None:
+        """Checkpoint the WAL if it has grown past its limit.
+
+        The checkpoint is PASSIVE, so it never waits for other connections;
+        once it has caught up, the next write restarts the WAL and truncates
+        it to ``journal_size_limit``.  Emptying it outright is left to an
+        explicit ``checkpoint("TRUNCATE")``, which can wait on the busy
+        timeout.
+        """
+        if self.wal_size() > _WAL_SIZE_LIMIT:
+            self.checkpoint("PASSIVE")
+
+    def backup(self, dest_path: str | Path) -> None:
+        """Copy the database to *dest_path* with SQLite's online backup API.
+
+        The whole database is copied in a single step, i.e. from one read
+        snapshot, so the copy is consistent even while other connections
+        write (under WAL) and includes changes not yet checkpointed.
+        """
+        with self._connection() as conn:
+            dest = sqlite3.connect(str(dest_path))
+            try:
+                conn.backup(dest)
+            finally:
+                dest.close()
+        # SQLite created the copy with the process umask; give it the
+        # database's own (shared) permissions.
+        try:
+            shutil.copymode(self.db_path, dest_path)
+        except OSError:
+            pass
 
     def keys(self, limit: int = 0, offset: int = 0) -> list[str]:
         """Return record keys with optional pagination."""
-        conn = self._connect()
-        try:
+        with self._connection() as conn:
             query = "SELECT key FROM records ORDER BY creation_date"
             params: list[Any] = []
             if limit > 0:
@@ -480,5 +1216,3 @@ class Store:
                 params = [limit, offset]
             rows = conn.execute(query, params).fetchall()
             return [r["key"] for r in rows]
-        finally:
-            conn.close()
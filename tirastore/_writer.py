@@ -0,0 +1,155 @@
+"""Background group commit for TiraStore.
+
+Records submitted through :meth:`TiraStore.record_async` are queued and
+written by a single background thread, which commits everything that
+arrived within a short window in one transaction.  Under bursts of writes
+this replaces one lock acquisition and one fsync per record by one per
+batch.  Writers still open at interpreter exit are flushed by an
+:mod:`atexit` hook, so queued records are not lost if ``close()`` is never
+called.
+"""
+
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable
+
+# A batch is committed once it holds this many records, or this many
+# seconds after its first record arrived, whichever comes first.
+_MAX_BATCH = 256
+_MAX_WAIT = 0.005
+
+_STOP = object()
+
+# Writers whose thread may still hold queued items (see _flush_at_exit()).
+_LIVE_WRITERS: "weakref.WeakSet[GroupWriter]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    # The writer threads are daemons, so the interpreter would otherwise
+    # kill them with their queues unwritten.
+    for writer in list(_LIVE_WRITERS):
+        writer.close()
+
+
+class GroupWriter:
+    """Commit queued items in batches on a background thread.
+
+    Parameters
+    ----------
+    commit : callable
+        Called with a list of submitted items; must write them in a single
+        transaction and return one result per item.  If it raises, every
+        future of the batch receives the exception.
+    max_batch : int
+        Largest number of items committed together.
+    max_wait : float
+        Seconds to wait for more items after the first one of a batch.
+    """
+
+    def __init__(
+        self,
+        commit: Callable[[list[Any]], list[Any]],
+        max_batch: int = _MAX_BATCH,
+        max_wait: float = _MAX_WAIT,
+    ) -> None:
+        self._commit = commit
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: queue.Queue = queue.Queue()
+        # Guards _stopped against submit(), so nothing is queued after the
+        # thread has drained the queue for the last time.
+        self._mutex = threading.Lock()
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="tirastore-writer", daemon=True
+        )
+        self._thread.start()
+        _LIVE_WRITERS.add(self)
+
+    @property
+    def stopped(self) -> bool:
+        """*True* once the thread has exited and no longer accepts items."""
+        return self._stopped
+
+    def submit(self, item: Any) -> Future:
+        """Queue *item*; the returned future resolves once it is committed.
+
+        Raises
+        ------
+        RuntimeError
+            If the writer has been closed or its thread has died.
+        """
+        future: Future = Future()
+        with self._mutex:
+            if self._stopped:
+                raise RuntimeError("GroupWriter is closed")
+            self._queue.put((item, future))
+        return future
+
+    def close(self) -> None:
+        """Commit everything queued so far, then stop the thread."""
+        _LIVE_WRITERS.discard(self)
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            self._loop()
+        finally:
+            # Whatever stopped the thread, including a BaseException raised
+            # by a commit, no future may be left waiting forever.
+            with self._mutex:
+                self._stopped = True
+            self._fail_pending(RuntimeError("GroupWriter stopped"))
+
+    def _fail_pending(self, exc: BaseException) -> None:
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if entry is not _STOP and entry[1].set_running_or_notify_cancel():
+                entry[1].set_exception(exc)
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+            self._commit_batch(batch)
+            if stop:
+                return
+
+    def _commit_batch(self, batch: list[tuple[Any, Future]]) -> None:
+        live = [(item, f) for item, f in batch if f.set_running_or_notify_cancel()]
+        if not live:
+            return
+        try:
+            results = self._commit([item for item, _ in live])
+        except BaseException as exc:
+            for _, future in live:
+                future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+        else:
+            for (_, future), result in zip(live, results):
+                future.set_result(result)
@@ -32,24 +32,44 @@ from __future__ import annotations
 import getpass
 import json
 import os
-import shutil
 import socket
+import threading
+from concurrent.futures import Future
+from contextlib import AbstractContextManager, nullcontext
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
+from tirastore import _json
+from tirastore._cache import LRUCache
 from tirastore._keys import make_key, make_program_hash
 from tirastore._lock import HardLinkLock
 from tirastore._schedule import normalize_schedule, validate_schedule
 from tirastore._store import Store
+from tirastore._writer import GroupWriter
 
 
 def _get_cpu_model() -> str:
     """Return the CPU model string for the current machine.
 
-    Uses py-cpuinfo if available, otherwise falls back to
-    reading /proc/cpuinfo on Linux.
+    The ``TIRASTORE_CPU_MODEL`` environment variable, if set, is used as-is
+    and skips detection.  Otherwise see :func:`_detect_cpu_model`.
+    """
+    override = os.environ.get("TIRASTORE_CPU_MODEL")
+    if override:
+        return override
+    return _detect_cpu_model()
+
+
+@lru_cache(maxsize=1)
+def _detect_cpu_model() -> str:
+    """Detect the CPU model, once per process.
+
+    Uses py-cpuinfo if available, falling back to reading /proc/cpuinfo on
+    Linux.  py-cpuinfo can take a noticeable fraction of a second, so the
+    result is reused by every later :class:`TiraStore` in the process.
     """
     try:
         import cpuinfo
@@ -74,10 +94,38 @@ def _get_slurm_cpus() -> str:
     return os.environ.get("SLURM_CPUS_PER_TASK", "N/A")
 
 
+@lru_cache(maxsize=4096)
+def _ms_to_iso(ms: int | str) -> str:
+    """Format a stored unix-millisecond timestamp as ISO 8601 (UTC).
+
+    Clients predating schema version 3 don't know about the migration and
+    keep writing ISO 8601 text into shared databases; such dates are
+    reformatted the same way.
+
+    Memoized: formatting costs more than decoding the rest of a record, and
+    dates repeat heavily (a record's two dates usually match, and a batch
+    shares one timestamp).
+    """
+    if isinstance(ms, str):
+        stamp = datetime.fromisoformat(ms)
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=timezone.utc)
+        return stamp.astimezone(timezone.utc).isoformat(timespec="milliseconds")
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat(
+        timespec="milliseconds"
+    )
+
+
 @dataclass
 class LookupResult:
     """Returned by :meth:`TiraStore.lookup` when a record is found."""
 
+    # Spelled out rather than dataclass(slots=True) to keep Python 3.9 support
+    __slots__ = (
+        "is_legal", "execution_times", "schedule", "hostname", "username",
+        "creation_date", "update_date", "source_project",
+    )
+
     is_legal: bool
     execution_times: Optional[list[float]]
     schedule: str
@@ -101,6 +149,118 @@ class LookupResult:
         }
 
 
+# result_json of unmeasured records (typically illegal schedules), as
+# _json.dumps would produce it.
+_UNMEASURED_RESULTS = {
+    flag: _json.dumps({"is_legal": flag, "execution_times": None})
+    for flag in (False, True)
+}
+
+
+def _encode_result(is_legal: bool, execution_times: Optional[list[float]]) -> str:
+    """Serialize a measurement to the ``result_json`` stored in the DB."""
+    if execution_times is None and type(is_legal) is bool:
+        return _UNMEASURED_RESULTS[is_legal]
+    return _json.dumps({"is_legal": is_legal, "execution_times": execution_times})
+
+
+def _result_from_row(row: dict[str, Any]) -> LookupResult:
+    """Build a :class:`LookupResult` from a records row."""
+    result = _json.loads(row["result_json"])
+    return LookupResult(
+        is_legal=result["is_legal"],
+        execution_times=result.get("execution_times"),
+        schedule=row["schedule"],
+        hostname=row["hostname"],
+        username=row["username"],
+        creation_date=_ms_to_iso(row["creation_date"]),
+        update_date=_ms_to_iso(row["update_date"]),
+        source_project=row["source_project"],
+    )
+
+
+def _prepare_entry(
+    label: str, prog_hash: str, entry: dict
+) -> tuple[str, str, str, str]:
+    """Validate one schedule entry and return its record row.
+
+    The row is ``(key, program_hash, normalized_schedule, result_json)``;
+    *label* prefixes error messages.
+    """
+    sched = entry["tiralib_schedule_string"]
+    is_legal = entry["is_legal"]
+    exec_times = entry.get("execution_times")
+
+    if is_legal and (exec_times is None or len(exec_times) == 0):
+        raise ValueError(
+            f"{label}: execution_times must be provided "
+            f"(non-empty list) when is_legal is True."
+        )
+
+    normalized_sched = normalize_schedule(sched)
+    valid, reason = validate_schedule(normalized_sched)
+    if not valid:
+        raise ValueError(f"{label}: Invalid schedule string: {reason}")
+
+    key = make_key(prog_hash, sched)
+    return key, prog_hash, normalized_sched, _encode_result(is_legal, exec_times)
+
+
+def _copy_result(result: LookupResult) -> LookupResult:
+    """Copy a cached result so callers can't alter the cached entry."""
+    times = result.execution_times
+    # Built directly: dataclasses.replace() costs more than the lookup's
+    # cache probe and key computation combined.
+    return LookupResult(
+        is_legal=result.is_legal,
+        execution_times=None if times is None else list(times),
+        schedule=result.schedule,
+        hostname=result.hostname,
+        username=result.username,
+        creation_date=result.creation_date,
+        update_date=result.update_date,
+        source_project=result.source_project,
+    )
+
+
+def _versioned(
+    programs: Iterator[tuple[str, str, list[tuple[str, str]]]],
+) -> Iterator[tuple[str, str, str, list[tuple[str, str]]]]:
+    """Prefix each ``(name, source, records)`` with its export key.
+
+    Names with several source versions get a ``_vN`` suffix.  The versions
+    of a name are adjacent in the stream, so looking one program ahead is
+    enough, and the keys agree with the one snapshot the stream reads.
+    """
+    prev = None
+    version = 0  # versions of prev's name already yielded
+    for program in programs:
+        if prev is not None:
+            if version or program[0] == prev[0]:
+                version += 1
+                yield (f"{prev[0]}_v{version}", *prev)
+            else:
+                yield (prev[0], *prev)
+            if program[0] != prev[0]:
+                version = 0
+        prev = program
+    if prev is not None:
+        key = f"{prev[0]}_v{version + 1}" if version else prev[0]
+        yield (key, *prev)
+
+
+# Databases this process has already created or validated, keyed by
+# ``TiraStore._db_identity()``, mapping to (journal mode in effect, DB
+# ``created_at``, DB CPU model, DB SLURM CPUs).  Tables only need creating or
+# migrating once and the CPU metadata never changes after creation, so later
+# instances for the same file skip the migration and the metadata queries.
+# ``created_at`` tells a database apart from a restored or re-created one
+# that reuses the same inode.
+_OPENED_DBS: dict[
+    tuple[Any, ...], tuple[str, Optional[str], Optional[str], Optional[str]]
+] = {}
+
+
 class TiraStore:
     """High-level interface to the distributed lookup table.
 
@@ -124,6 +284,19 @@ class TiraStore:
         (useful for admin/migration tasks).
     stale_lock_timeout : float
         Seconds before a held lock is considered stale (default 600).
+    journal_mode : str or None
+        SQLite journal mode, ``"DELETE"`` or ``"WAL"``, for a new database.
+        If *None* (default), it is chosen from the filesystem holding the
+        database: WAL on known local filesystems (ext4, xfs, ...), DELETE on
+        Lustre and anything else.  An existing database always keeps the
+        mode it was created with.
+    lookup_cache_size : int
+        Number of :meth:`lookup` results kept in memory (default 16384).
+        ``0`` disables the cache.
+    compress_source : bool
+        If *True*, program sources of 1 KiB or more are stored
+        zlib-compressed when first recorded (default *False*).  Sources are
+        decompressed transparently on read, whichever way they were stored.
     """
 
     def __init__(
@@ -134,6 +307,9 @@ class TiraStore:
         slurm_cpus: Optional[str] = None,
         allow_cpu_mismatch: bool = False,
         stale_lock_timeout: float = 600.0,
+        journal_mode: Optional[str] = None,
+        lookup_cache_size: int = 16384,
+        compress_source: bool = False,
     ) -> None:
         self.db_path = Path(db_path).resolve()
         self.source_project = source_project
@@ -143,39 +319,123 @@ class TiraStore:
             self.db_path.with_suffix(".db.lock"),
             stale_timeout=stale_lock_timeout,
         )
-        self._store = Store(self.db_path)
-
-        # Detect local machine info (done once at init)
-        self._local_cpu_model = cpu_model or _get_cpu_model()
+        self._store = Store(
+            self.db_path, journal_mode=journal_mode, compress_source=compress_source
+        )
+        self._requested_journal_mode = journal_mode.upper() if journal_mode else None
+        # Only hits are cached: a miss may be filled in by another worker at
+        # any moment, whereas a found record only changes if overwritten.
+        self._lookup_cache = LRUCache(lookup_cache_size)
+
+        # Local machine info is detected on first use (see the properties
+        # below); readers of a matching database never need the hostname.
+        self._cpu_model_arg = cpu_model
         self._local_slurm_cpus = slurm_cpus or _get_slurm_cpus()
-        self._hostname = socket.gethostname()
-        self._username = getpass.getuser()
+
+        # Background writer for record_async(), started on first use.  It
+        # takes the hard-link lock through its own instance, since a
+        # HardLinkLock must not be shared between threads.
+        self._writer: Optional[GroupWriter] = None
+        self._writer_pid = 0
+        self._writer_mutex = threading.Lock()
+        self._writer_lock = HardLinkLock(
+            self._lock.lock_path, stale_timeout=stale_lock_timeout
+        )
 
         # Initialize or validate
         self._writes_allowed = True
-        self._init_or_validate(cpu_model, slurm_cpus)
+        self._lock_needed = True
+        self._init_or_validate()
+
+    # ------------------------------------------------------------------
+    # Local machine info (detected lazily, once)
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def _local_cpu_model(self) -> str:
+        return self._cpu_model_arg or _get_cpu_model()
+
+    @cached_property
+    def _hostname(self) -> str:
+        return socket.gethostname()
+
+    @cached_property
+    def _username(self) -> str:
+        return getpass.getuser()
 
     # ------------------------------------------------------------------
     # Initialization / validation
     # ------------------------------------------------------------------
 
-    def _init_or_validate(
-        self,
-        cpu_model_arg: Optional[str],
-        slurm_cpus_arg: Optional[str],
-    ) -> None:
-        """Create the database if needed; validate CPU metadata otherwise."""
-        with self._lock:
-            if not self.db_path.exists():
-                self._create_db(cpu_model_arg, slurm_cpus_arg)
-            else:
-                self._validate_cpu()
+    def _init_or_validate(self) -> None:
+        """Create the database if needed; validate CPU metadata otherwise.
 
-    def _create_db(
-        self,
-        cpu_model_arg: Optional[str],
-        slurm_cpus_arg: Optional[str],
-    ) -> None:
+        Only the first instance per database file in a process does the
+        work under the lock; later ones reuse its findings (see
+        ``_OPENED_DBS``) once the file's ``created_at`` confirms it is the
+        same database, and just compare them with their own machine info.
+        """
+        opened = _OPENED_DBS.get(self._db_identity())
+        if opened is not None:
+            mode, created_at, db_cpu, db_slurm = opened
+            # A plain read, which needs the hard-link lock outside WAL.
+            with self._lock if mode != "WAL" else nullcontext():
+                if self._store.read_raw_meta("created_at") != created_at:
+                    opened = None
+        if opened is not None:
+            self._store.journal_mode = mode
+            self._check_cpu(db_cpu, db_slurm)
+        else:
+            with self._lock:
+                if not self.db_path.exists():
+                    self._create_db()
+                    db_cpu, db_slurm = self._local_cpu_model, self._local_slurm_cpus
+                else:
+                    self._store.ensure_tables()
+                    db_cpu, db_slurm = self._store.get_cpu_metadata()
+                    self._check_cpu(db_cpu, db_slurm)
+                created_at = self._store.read_raw_meta("created_at")
+            identity = self._db_identity()
+            if identity is not None:
+                _OPENED_DBS[identity] = (
+                    self._store.journal_mode, created_at, db_cpu, db_slurm
+                )
+        # WAL is only used on local filesystems, where SQLite's own locking
+        # is reliable: each read sees a consistent snapshot while another
+        # connection writes, and writers serialize on BEGIN IMMEDIATE.  The
+        # hard-link lock is then only needed to create the database.  The
+        # mode is the one recorded in the database, and only final once a
+        # connection has been opened above.
+        self._lock_needed = self._store.journal_mode != "WAL"
+        if not self._lock_needed and opened is None:
+            self._store.trim_wal()
+
+    def _db_identity(self) -> Optional[tuple[Any, ...]]:
+        """Key of this database in ``_OPENED_DBS``, or *None* if it is absent.
+
+        The inode tells a database apart from one re-created at the same
+        path, unless the filesystem reuses the inode number; the cached
+        ``created_at`` is checked for that case.  The requested journal mode
+        is part of the key so that an instance asking for another mode than
+        the database's goes through :meth:`Store.load_journal_mode` and its
+        warning.
+        """
+        try:
+            st = os.stat(self.db_path)
+        except OSError:
+            return None
+        return (str(self.db_path), st.st_dev, st.st_ino, self._requested_journal_mode)
+
+    def _read_guard(self) -> AbstractContextManager[Any]:
+        """Return the context manager that database operations run under."""
+        return self._lock if self._lock_needed else nullcontext()
+
+    # Reads and writes need the same guard: under DELETE both take the
+    # hard-link lock, and under WAL neither does (SQLite's locking serializes
+    # writers).  Both names are kept so call sites say which kind they are.
+    _write_guard = _read_guard
+
+    def _create_db(self) -> None:
         """First-time database creation."""
         # Ensure the parent directory exists and is world-writable
         parent = self.db_path.parent
@@ -185,16 +445,10 @@ class TiraStore:
         except OSError:
             pass
 
-        db_cpu = cpu_model_arg if cpu_model_arg else _get_cpu_model()
-        db_slurm = slurm_cpus_arg if slurm_cpus_arg else _get_slurm_cpus()
-
-        self._store.init_db(db_cpu, db_slurm)
+        self._store.init_db(self._local_cpu_model, self._local_slurm_cpus)
 
-    def _validate_cpu(self) -> None:
+    def _check_cpu(self, db_cpu: Optional[str], db_slurm: Optional[str]) -> None:
         """Check that the local CPU matches the database's CPU metadata."""
-        db_cpu = self._store.get_cpu_model()
-        db_slurm = self._store.get_slurm_cpus()
-
         mismatch_parts: list[str] = []
         if db_cpu and db_cpu != self._local_cpu_model:
             mismatch_parts.append(
@@ -234,25 +488,118 @@ class TiraStore:
         """Look up a previously recorded result.
 
         Returns a :class:`LookupResult` if found, otherwise *None*.
+        Found results are cached in memory, so a record overwritten by
+        another process may be reported with its previous values until it
+        is evicted.
         """
         prog_hash = make_program_hash(program_source_code)
         key = make_key(prog_hash, tiralib_schedule_string)
-        with self._lock:
-            row = self._store.get(key)
-        if row is None:
-            return None
-        result = json.loads(row["result_json"])
-        return LookupResult(
-            is_legal=result["is_legal"],
-            execution_times=result.get("execution_times"),
-            schedule=row["schedule"],
-            hostname=row["hostname"],
-            username=row["username"],
-            creation_date=row["creation_date"],
-            update_date=row["update_date"],
-            source_project=row["source_project"],
+        result = self._lookup_cache.get(key)
+        if result is None:
+            with self._read_guard():
+                row = self._store.get_result(key)
+            if row is None:
+                return None
+            result = _result_from_row(row)
+            self._lookup_cache.put(key, result)
+        return _copy_result(result)
+
+    def lookup_many(
+        self,
+        program_name: str,
+        program_source_code: str,
+        tiralib_schedule_strings: list[str],
+    ) -> list[Optional[LookupResult]]:
+        """Look up several schedules of the same program at once.
+
+        Returns a list aligned with *tiralib_schedule_strings*, holding a
+        :class:`LookupResult` for each recorded schedule and *None* for the
+        others.  Cached results are reused and all remaining schedules are
+        fetched with batched queries.
+        """
+        prog_hash = make_program_hash(program_source_code)
+        return self._lookup_keys(
+            [make_key(prog_hash, sched) for sched in tiralib_schedule_strings]
         )
 
+    def lookup_batch(
+        self, queries: list[tuple[str, str, str]]
+    ) -> list[Optional[LookupResult]]:
+        """Look up schedules of any number of programs at once.
+
+        Parameters
+        ----------
+        queries : list of (program_name, program_source_code, tiralib_schedule_string)
+            The (program, schedule) pairs to look up.
+
+        Returns a list aligned with *queries*, like :meth:`lookup_many`.
+        """
+        return self._lookup_keys([
+            make_key(make_program_hash(source), sched)
+            for _, source, sched in queries
+        ])
+
+    def _lookup_keys(self, keys: list[str]) -> list[Optional[LookupResult]]:
+        results: dict[str, LookupResult] = {}
+        for key in keys:
+            hit = self._lookup_cache.get(key)
+            if hit is not None:
+                results[key] = hit
+        missing = [key for key in dict.fromkeys(keys) if key not in results]
+        if missing:
+            with self._read_guard():
+                rows = self._store.get_many(missing)
+            for key, row in rows.items():
+                results[key] = _result_from_row(row)
+                self._lookup_cache.put(key, results[key])
+
+        return [
+            _copy_result(results[key]) if key in results else None
+            for key in keys
+        ]
+
+    def lookup_stats(
+        self,
+        program_name: str,
+        program_source_code: str,
+        tiralib_schedule_strings: list[str],
+    ) -> list[Optional[tuple[bool, Optional[float], Optional[float]]]]:
+        """Look up the legality and timing summary of several schedules.
+
+        Cheaper than :meth:`lookup_many` when only the best or average
+        execution time matters: SQLite reduces the stored measurements, and
+        no :class:`LookupResult` or per-measurement list is built.
+
+        Returns a list aligned with *tiralib_schedule_strings*, holding
+        ``(is_legal, min_time, mean_time)`` for each recorded schedule (times
+        are *None* when nothing was measured) and *None* for the others.
+        """
+        prog_hash = make_program_hash(program_source_code)
+        keys = [make_key(prog_hash, sched) for sched in tiralib_schedule_strings]
+        with self._read_guard():
+            stats = self._store.get_time_stats(list(dict.fromkeys(keys)))
+        return [stats.get(key) for key in keys]
+
+    def preload(self, program_name: str, program_source_code: str) -> int:
+        """Load all records of a program into the lookup cache.
+
+        Meant for read-mostly sweeps: one streamed query fills the cache, and
+        later :meth:`lookup` hits for this program are served from memory
+        without touching the database or decoding JSON.  Schedules recorded
+        afterwards by other processes are still found, since misses always
+        query the database.
+
+        Returns the number of records loaded (at most ``lookup_cache_size``
+        of them stay cached).
+        """
+        prog_hash = make_program_hash(program_source_code)
+        loaded = 0
+        with self._read_guard():
+            for row in self._store.iter_records_by_program_hash(prog_hash):
+                self._lookup_cache.put(row["key"], _result_from_row(row))
+                loaded += 1
+        return loaded
+
     def record(
         self,
         program_name: str,
@@ -303,16 +650,12 @@ class TiraStore:
         prog_hash = make_program_hash(program_source_code)
         key = make_key(prog_hash, tiralib_schedule_string)
 
-        result_obj = {
-            "is_legal": is_legal,
-            "execution_times": execution_times,
-        }
-        result_json = json.dumps(result_obj, separators=(",", ":"), ensure_ascii=True)
+        result_json = _encode_result(is_legal, execution_times)
 
-        with self._lock:
+        with self._write_guard():
             # Ensure the program is stored (insert-if-absent)
             self._store.put_program(prog_hash, program_name, program_source_code)
-            return self._store.put(
+            wrote = self._store.put(
                 key=key,
                 program_hash=prog_hash,
                 schedule=normalized_sched,
@@ -322,6 +665,81 @@ class TiraStore:
                 source_project=self.source_project,
                 overwrite=overwrite,
             )
+        if wrote:
+            self._lookup_cache.pop(key)
+        return wrote
+
+    def record_async(
+        self,
+        program_name: str,
+        program_source_code: str,
+        tiralib_schedule_string: str,
+        is_legal: bool,
+        execution_times: Optional[list[float]] = None,
+        overwrite: bool = False,
+    ) -> Future:
+        """Queue a measurement result for a grouped commit.
+
+        Takes the same arguments as :meth:`record` and validates them right
+        away.  The write itself is done by a background thread that commits
+        all records queued within a few milliseconds (up to 256) in one
+        transaction, so bursts of writes share a single lock acquisition and
+        fsync.  Pending records are flushed by :meth:`close`.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to what :meth:`record` would have returned once the
+            record is committed, or raises the error that prevented it.
+
+        Raises
+        ------
+        ValueError
+            If ``is_legal`` is True but ``execution_times`` is None or empty,
+            or if the schedule string is invalid.
+        PermissionError
+            If writes are disabled due to CPU mismatch.
+        """
+        self._check_writes()
+        prog_hash = make_program_hash(program_source_code)
+        row = _prepare_entry("record_async", prog_hash, {
+            "tiralib_schedule_string": tiralib_schedule_string,
+            "is_legal": is_legal,
+            "execution_times": execution_times,
+        })
+        program = (prog_hash, program_name, program_source_code)
+        return self._group_writer().submit((row, overwrite, program))
+
+    def _group_writer(self) -> GroupWriter:
+        with self._writer_mutex:
+            # The writer thread does not survive fork(); start a new one,
+            # as after a commit error that stopped the thread.
+            if (
+                self._writer is None
+                or self._writer_pid != os.getpid()
+                or self._writer.stopped
+            ):
+                self._writer = GroupWriter(self._commit_group)
+                self._writer_pid = os.getpid()
+            return self._writer
+
+    def _commit_group(
+        self, items: list[tuple[tuple[str, str, str, str], bool, tuple[str, str, str]]]
+    ) -> list[bool]:
+        rows = [row + (overwrite,) for row, overwrite, _ in items]
+        guard = self._writer_lock if self._lock_needed else nullcontext()
+        with guard:
+            written = self._store.put_each(
+                rows,
+                hostname=self._hostname,
+                username=self._username,
+                source_project=self.source_project,
+                programs=[program for _, _, program in items],
+            )
+        for row, wrote in zip(rows, written):
+            if wrote:
+                self._lookup_cache.pop(row[0])
+        return written
 
     def record_many(
         self,
@@ -364,43 +782,94 @@ class TiraStore:
         prog_hash = make_program_hash(program_source_code)
 
         # Validate all entries before writing anything
-        prepared: list[tuple[str, str, str]] = []
-        for i, entry in enumerate(schedules):
-            sched = entry["tiralib_schedule_string"]
-            is_legal = entry["is_legal"]
-            exec_times = entry.get("execution_times")
-
-            if is_legal and (exec_times is None or len(exec_times) == 0):
-                raise ValueError(
-                    f"schedules[{i}]: execution_times must be provided "
-                    f"(non-empty list) when is_legal is True."
-                )
+        prepared = [
+            _prepare_entry(f"schedules[{i}]", prog_hash, entry)
+            for i, entry in enumerate(schedules)
+        ]
+        return self._write_prepared(
+            prepared, [(prog_hash, program_name, program_source_code)], overwrite
+        )
 
-            normalized_sched = normalize_schedule(sched)
-            valid, reason = validate_schedule(normalized_sched)
-            if not valid:
-                raise ValueError(f"schedules[{i}]: Invalid schedule string: {reason}")
+    def record_batch(self, entries: list[dict], overwrite: bool = False) -> int:
+        """Record schedules of any number of programs in one operation.
 
-            key = make_key(prog_hash, sched)
-            result_obj = {
-                "is_legal": is_legal,
-                "execution_times": exec_times,
-            }
-            result_json = json.dumps(
-                result_obj, separators=(",", ":"), ensure_ascii=True
+        Like :meth:`record_many`, but every entry names its own program, so a
+        whole sweep over several programs costs a single lock acquisition
+        and a single transaction.
+
+        Parameters
+        ----------
+        entries : list of dict
+            Each dict must have keys:
+            - ``program_name`` (str)
+            - ``program_source_code`` (str)
+            - ``tiralib_schedule_string`` (str)
+            - ``is_legal`` (bool)
+            - ``execution_times`` (list of float or None)
+        overwrite : bool
+            If *True*, overwrite existing records.
+
+        Returns
+        -------
+        int
+            Number of records actually written.
+
+        Raises
+        ------
+        ValueError
+            If any schedule is invalid, or if ``is_legal`` is True but
+            ``execution_times`` is None or empty.
+        PermissionError
+            If writes are disabled due to CPU mismatch.
+        """
+        self._check_writes()
+
+        prepared = []
+        programs = []
+        for i, entry in enumerate(entries):
+            prog_hash = make_program_hash(entry["program_source_code"])
+            prepared.append(_prepare_entry(f"entries[{i}]", prog_hash, entry))
+            programs.append(
+                (prog_hash, entry["program_name"], entry["program_source_code"])
             )
-            prepared.append((key, normalized_sched, result_json))
+        return self._write_prepared(prepared, programs, overwrite)
 
-        with self._lock:
-            self._store.put_program(prog_hash, program_name, program_source_code)
-            return self._store.put_many(
+    def _write_prepared(
+        self,
+        prepared: list[tuple[str, str, str, str]],
+        programs: list[tuple[str, str, str]],
+        overwrite: bool,
+    ) -> int:
+        if not prepared and not programs:
+            return 0
+        if not overwrite and prepared:
+            # Drop rows that are already stored before taking the write
+            # lock; a fully re-submitted batch then never writes at all (its
+            # program is stored with its records).  An empty batch still
+            # goes on to register the program.
+            # Not from the cache, which misses deletions by other processes.
+            with self._read_guard():
+                existing = self._store.existing_keys(
+                    [p[0] for p in prepared], cached=False
+                )
+            prepared = [p for p in prepared if p[0] not in existing]
+            if not prepared:
+                return 0
+
+        with self._write_guard():
+            written = self._store.put_records(
                 rows=prepared,
-                program_hash=prog_hash,
                 hostname=self._hostname,
                 username=self._username,
                 source_project=self.source_project,
                 overwrite=overwrite,
+                programs=programs,
             )
+        # Even without overwrite, a key may be written again after another
+        # process deleted it, which leaves a stale result cached here.
+        for key, _, _, _ in prepared:
+            self._lookup_cache.pop(key)
+        return written
 
     # ------------------------------------------------------------------
     # Public API — convenience / admin
@@ -415,13 +884,40 @@ class TiraStore:
         """Check if a record exists for the given input."""
         prog_hash = make_program_hash(program_source_code)
         key = make_key(prog_hash, tiralib_schedule_string)
-        with self._lock:
+        if key in self._lookup_cache:
+            return True
+        with self._read_guard():
             return self._store.contains(key)
 
+    def contains_many(
+        self,
+        program_name: str,
+        program_source_code: str,
+        tiralib_schedule_strings: list[str],
+    ) -> list[bool]:
+        """Check which schedules of a program have been recorded.
+
+        Returns a list of booleans aligned with *tiralib_schedule_strings*.
+        Keys known to exist are answered from memory; the others are checked
+        with batched key-only queries.
+        """
+        prog_hash = make_program_hash(program_source_code)
+        keys = [make_key(prog_hash, sched) for sched in tiralib_schedule_strings]
+        unknown = [key for key in dict.fromkeys(keys) if key not in self._lookup_cache]
+        found: set[str] = set(keys).difference(unknown)
+        if unknown:
+            with self._read_guard():
+                found |= self._store.existing_keys(unknown)
+        return [key in found for key in keys]
+
     def get(self, key: str) -> Optional[dict[str, Any]]:
         """Retrieve a raw record (joined with program data) by its SHA-256 key."""
-        with self._lock:
-            return self._store.get(key)
+        with self._read_guard():
+            row = self._store.get(key)
+        if row is not None:
+            row["creation_date"] = _ms_to_iso(row["creation_date"])
+            row["update_date"] = _ms_to_iso(row["update_date"])
+        return row
 
     def put(
         self,
@@ -436,8 +932,8 @@ class TiraStore:
         The referenced program must already exist in the programs table.
         """
         self._check_writes()
-        with self._lock:
-            return self._store.put(
+        with self._write_guard():
+            wrote = self._store.put(
                 key=key,
                 program_hash=program_hash,
                 schedule=schedule,
@@ -447,6 +943,9 @@ class TiraStore:
                 source_project=self.source_project,
                 overwrite=overwrite,
             )
+        if wrote:
+            self._lookup_cache.pop(key)
+        return wrote
 
     def get_program_source(self, program_name: str) -> list[dict[str, str]]:
         """Retrieve source code for a program by name.
@@ -455,7 +954,7 @@ class TiraStore:
         ``source_code``.  Multiple entries are returned if different
         source versions share the same name.
         """
-        with self._lock:
+        with self._read_guard():
             rows = self._store.get_programs_by_name(program_name)
         return [
             {
@@ -476,31 +975,39 @@ class TiraStore:
         schedule that has been recorded for this program.
         """
         prog_hash = make_program_hash(program_source_code)
-        with self._lock:
-            rows = self._store.get_records_by_program_hash(prog_hash)
-        results: list[LookupResult] = []
-        for row in rows:
-            result = json.loads(row["result_json"])
-            results.append(
-                LookupResult(
-                    is_legal=result["is_legal"],
-                    execution_times=result.get("execution_times"),
-                    schedule=row["schedule"],
-                    hostname=row["hostname"],
-                    username=row["username"],
-                    creation_date=row["creation_date"],
-                    update_date=row["update_date"],
-                    source_project=row["source_project"],
-                )
-            )
-        return results
+        with self._read_guard():
+            return [
+                _result_from_row(row)
+                for row in self._store.iter_records_by_program_hash(prog_hash)
+            ]
+
+    def get_program_details(
+        self,
+        program_name: str,
+        program_source_code: str,
+    ) -> Optional[tuple[str, list[LookupResult]]]:
+        """Retrieve a program's stored source code and all of its records.
+
+        Equivalent to :meth:`get_program_records` plus the matching entry of
+        :meth:`get_program_source`, but read in a single query round.
+
+        Returns ``(source_code, records)``, or *None* if the program has
+        never been recorded.
+        """
+        prog_hash = make_program_hash(program_source_code)
+        with self._read_guard():
+            found = self._store.get_program_and_records(prog_hash)
+        if found is None:
+            return None
+        program, rows = found
+        return program["source_code"], [_result_from_row(row) for row in rows]
 
     # ------------------------------------------------------------------
     # Public API — backup & export
     # ------------------------------------------------------------------
 
     def backup(self, backup_path: str | Path | None = None) -> Path:
-        """Create a snapshot copy of the database file.
+        """Create a consistent snapshot copy of the database.
 
         Parameters
         ----------
@@ -520,8 +1027,11 @@ class TiraStore:
             backup_path = self.db_path.with_name(f"{stem}_{ts}.db")
         backup_path = Path(backup_path).resolve()
 
-        with self._lock:
-            shutil.copy2(str(self.db_path), str(backup_path))
+        with self._read_guard():
+            if not self._lock_needed:
+                # Fold the WAL back in while we're at it; PASSIVE never waits
+                self._store.checkpoint("PASSIVE")
+            self._store.backup(backup_path)
 
         return backup_path
 
@@ -570,72 +1080,70 @@ class TiraStore:
 
         output_path = Path(output_path).resolve()
 
-        with self._lock:
-            all_data = self._store.get_all_programs_with_records()
-
-        # Group by program_name, detect duplicates needing _vN suffix
-        by_name: dict[str, list[dict[str, Any]]] = {}
-        for entry in all_data:
-            name = entry["program_name"]
-            by_name.setdefault(name, []).append(entry)
-
-        export_dict: dict[str, dict[str, Any]] = {}
-        for name, versions in by_name.items():
-            needs_suffix = len(versions) > 1
-            for idx, entry in enumerate(versions):
-                result = json.loads(entry["records"][0]["result_json"]) if entry["records"] else {}
+        with self._read_guard(), open(output_path, "w", encoding="utf-8") as f:
+            first = True
+            if fmt == "json":
+                f.write("{")
+            programs = _versioned(self._store.iter_programs_with_records())
+            for key, name, source_code, records in programs:
                 schedules_list = []
-                for rec in entry["records"]:
-                    r = json.loads(rec["result_json"])
+                for schedule, result_json in records:
+                    r = _json.loads(result_json)
                     schedules_list.append({
-                        "schedule_str": rec["schedule"],
+                        "schedule_str": schedule,
                         "is_legal": r["is_legal"],
                         "execution_times": r.get("execution_times"),
                     })
 
-                key = f"{name}_v{idx + 1}" if needs_suffix else name
-                export_dict[key] = {
-                    "Tiramisu_cpp": entry["source_code"],
+                value = {
+                    "Tiramisu_cpp": source_code,
                     "schedules_list": schedules_list,
                     "program_name": name,
                 }
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            if fmt == "json":
-                json.dump(export_dict, f, indent=2, ensure_ascii=False)
-                f.write("\n")
-            else:  # jsonl
-                for key, value in export_dict.items():
-                    line_obj = {key: value}
-                    f.write(json.dumps(line_obj, ensure_ascii=False))
+                if fmt == "json":
+                    # Same bytes json.dump(..., indent=2) would write for the
+                    # whole mapping: each entry is nested one level deeper.
+                    body = json.dumps(value, indent=2, ensure_ascii=False)
+                    f.write("\n  " if first else ",\n  ")
+                    f.write(json.dumps(key, ensure_ascii=False))
+                    f.write(": ")
+                    f.write(body.replace("\n", "\n  "))
+                else:  # jsonl
+                    f.write(json.dumps({key: value}, ensure_ascii=False))
                     f.write("\n")
+                first = False
+            if fmt == "json":
+                f.write("}\n" if first else "\n}\n")
 
         return output_path
 
     def delete(self, key: str) -> bool:
         """Delete a record by its SHA-256 key."""
         self._check_writes()
-        with self._lock:
-            return self._store.delete(key)
+        with self._write_guard():
+            deleted = self._store.delete(key)
+        self._lookup_cache.pop(key)
+        return deleted
 
     def count(self) -> int:
         """Return the total number of records."""
-        with self._lock:
+        with self._read_guard():
             return self._store.count()
 
     def program_count(self) -> int:
         """Return the total number of distinct programs."""
-        with self._lock:
+        with self._read_guard():
             return self._store.program_count()
 
     def stats(self) -> dict[str, Any]:
         """Return summary statistics about the database."""
-        with self._lock:
+        with self._read_guard():
             return self._store.stats()
 
     def keys(self, limit: int = 0, offset: int = 0) -> list[str]:
         """Return record keys with optional pagination."""
-        with self._lock:
+        with self._read_guard():
             return self._store.keys(limit=limit, offset=offset)
 
     @property
@@ -643,18 +1151,58 @@ class TiraStore:
         """Whether write operations are permitted on this connection."""
         return self._writes_allowed
 
+    @property
+    def journal_mode(self) -> str:
+        """The SQLite journal mode in effect (``"WAL"`` or ``"DELETE"``)."""
+        return self._store.journal_mode
+
     @property
     def cpu_model(self) -> Optional[str]:
         """The CPU model stored in the database metadata."""
-        with self._lock:
+        with self._read_guard():
             return self._store.get_cpu_model()
 
     @property
     def slurm_cpus(self) -> Optional[str]:
         """The SLURM_CPUS_PER_TASK value stored in the database metadata."""
-        with self._lock:
+        with self._read_guard():
             return self._store.get_slurm_cpus()
 
+    def checkpoint(self) -> bool:
+        """Checkpoint the WAL into the database file and truncate it.
+
+        Admin helper for long-running processes.  Only meaningful in WAL
+        mode; in DELETE mode there is nothing to do.
+
+        Returns
+        -------
+        bool
+            *True* if the checkpoint completed, *False* if concurrent
+            readers or writers kept part of the WAL in use.
+        """
+        if self.journal_mode != "WAL":
+            return True
+        busy, _, _ = self._store.checkpoint("TRUNCATE")
+        return not busy
+
+    def close(self) -> None:
+        """Flush pending :meth:`record_async` writes and close connections.
+
+        Connections are only held open in WAL mode, where each thread keeps
+        one between calls.  The instance stays usable after closing.
+        """
+        with self._writer_mutex:
+            writer, self._writer = self._writer, None
+        if writer is not None and self._writer_pid == os.getpid():
+            writer.close()
+        self._store.close()
+
+    def __enter__(self) -> "TiraStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
     def __repr__(self) -> str:
         return (
             f"TiraStore(db_path={str(self.db_path)!r}, "